@@ -1,9 +1,19 @@
 """Indonesian language analyzer with stemming capabilities"""
 
 import re
-from typing import List, Dict, Tuple, Set
+import heapq
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Tuple, Set, Iterable
 from collections import Counter, defaultdict
 
+# Precompiled patterns for text normalization and tokenization
+_URL_PATTERN = re.compile(r'http[s]?://\S+')
+_EMAIL_PATTERN = re.compile(r'\S+@\S+')
+_NUMBER_PATTERN = re.compile(r'\b\d+\b')
+_SYMBOL_PATTERN = re.compile(r'[^\w\s\-]')
+_WORD_PATTERN = re.compile(r'\b\w+\b')
+
 
 class IndonesianAnalyzer:
     """Indonesian language morphological analyzer"""
@@ -67,7 +77,7 @@ class IndonesianAnalyzer:
         ]
         
         # Common Indonesian root words for validation
-        self.common_roots = {
+        self.common_roots = frozenset({
             'makan', 'minum', 'tidur', 'kerja', 'jalan', 'baca', 'tulis',
             'lihat', 'dengar', 'bicara', 'pikir', 'rasa', 'buat', 'beli',
             'jual', 'kirim', 'terima', 'buka', 'tutup', 'mulai', 'akhir',
@@ -75,7 +85,7 @@ class IndonesianAnalyzer:
             'berdiri', 'lari', 'terbang', 'renang', 'main', 'bantu', 'ajar',
             'belajar', 'paham', 'tahu', 'ingat', 'lupa', 'cinta', 'suka',
             'benci', 'takut', 'berani', 'marah', 'sedih', 'senang', 'bahagia'
-        }
+        })
         
         # Phonological rules for prefix modifications
         self.phonological_rules = {
@@ -102,34 +112,59 @@ class IndonesianAnalyzer:
             }
         }
         
-    def analyze_text(self, text: str) -> Dict[str, any]:
-        """Analyze Indonesian text and return word statistics"""
-        # Normalize text
-        text = self._normalize_text(text)
+        # Affix patterns indexed by first/last letter, keeping rule order
+        self._prefix_index = self._index_affixes(self.prefixes, 0)
+        self._suffix_index = self._index_affixes(self.suffixes, -1)
         
-        # Tokenize
-        words = self._tokenize(text)
+        # Memoize stemming since the same words repeat throughout a corpus
+        self._stem_cached = lru_cache(maxsize=200_000)(self._stem)
         
-        # Get stems and frequencies
-        stems = []
+    @staticmethod
+    def _index_affixes(affixes: Dict[str, List[str]], 
+                       position: int) -> Dict[str, Tuple[Tuple[str, str], ...]]:
+        """Group (affix_group, pattern) pairs by the pattern's first or last letter"""
+        index = defaultdict(list)
+        for group, patterns in affixes.items():
+            for pattern in patterns:
+                index[pattern[position]].append((group, pattern))
+        return {letter: tuple(entries) for letter, entries in index.items()}
+        
+    def analyze_text(self, text: str) -> Dict[str, any]:
+        """Analyze Indonesian text and return word statistics"""
+        return self.analyze_texts((text,))
+        
+    def analyze_texts(self, texts: Iterable[str]) -> Dict[str, any]:
+        """Analyze several Indonesian texts (e.g. files) as one corpus
+        
+        Texts are normalized and counted one at a time, so an iterator can
+        be passed and the texts are never concatenated.
+        """
+        total_words = 0
+        word_freq = Counter()
+        for text in texts:
+            # Normalize and tokenize
+            words = self._tokenize(self._normalize_text(text))
+            total_words += len(words)
+            word_freq.update(words)
+        
+        # Get stems and frequencies (each distinct word is stemmed once)
         stem_to_words = defaultdict(set)
-        word_freq = Counter(words)
+        stem_freq = Counter()
         
-        for word in words:
+        for word, count in word_freq.items():
             stem = self.stem(word)
-            stems.append(stem)
+            stem_freq[stem] += count
             stem_to_words[stem].add(word)
-            
-        stem_freq = Counter(stems)
         
         # Calculate statistics
         results = {
-            'total_words': len(words),
-            'unique_words': len(set(words)),
-            'total_stems': len(stems),
+            'total_words': total_words,
+            'unique_words': len(word_freq),
+            'total_stems': total_words,
             'unique_stems': len(stem_freq),
-            'word_frequency': dict(word_freq.most_common()),
-            'stem_frequency': dict(stem_freq.most_common()),
+            # Full frequency maps are left unsorted; use top_words/top_stems for rankings
+            'word_frequency': dict(word_freq),
+            'stem_frequency': dict(stem_freq),
             'stem_to_words': {k: list(v) for k, v in stem_to_words.items()},
             'top_words': word_freq.most_common(20),
             'top_stems': stem_freq.most_common(20)
@@ -139,6 +174,10 @@ class IndonesianAnalyzer:
         
     def stem(self, word: str) -> str:
         """Stem an Indonesian word"""
+        return self._stem_cached(word)
+        
+    def _stem(self, word: str) -> str:
+        """Stem an Indonesian word (uncached)"""
         if not word or len(word) < 3:
             return word
             
@@ -171,16 +210,16 @@ class IndonesianAnalyzer:
         text = text.lower()
         
         # Remove URLs
-        text = re.sub(r'http[s]?://\S+', '', text)
+        text = _URL_PATTERN.sub('', text)
         
         # Remove email addresses
-        text = re.sub(r'\S+@\S+', '', text)
+        text = _EMAIL_PATTERN.sub('', text)
         
         # Remove numbers (but keep words with numbers)
-        text = re.sub(r'\b\d+\b', '', text)
+        text = _NUMBER_PATTERN.sub('', text)
         
         # Keep only letters and basic punctuation
-        text = re.sub(r'[^\w\s\-]', ' ', text)
+        text = _SYMBOL_PATTERN.sub(' ', text)
         
         # Normalize whitespace
         text = ' '.join(text.split())
@@ -190,7 +229,7 @@ class IndonesianAnalyzer:
     def _tokenize(self, text: str) -> List[str]:
         """Tokenize text into words"""
         # Split by whitespace and punctuation
-        words = re.findall(r'\b\w+\b', text)
+        words = _WORD_PATTERN.findall(text)
         
         # Filter out very short words and numbers
         words = [w for w in words if len(w) > 2 and not w.isdigit()]
@@ -199,29 +238,27 @@ class IndonesianAnalyzer:
         
     def _remove_prefix(self, word: str) -> str:
         """Remove prefix from word"""
-        # Try each prefix pattern
-        for prefix_group, patterns in self.prefixes.items():
-            for pattern in patterns:
-                if word.startswith(pattern):
-                    # Get the stem candidate
-                    stem = word[len(pattern):]
+        # Try each prefix pattern starting with the word's first letter
+        for prefix_group, pattern in self._prefix_index.get(word[:1], ()):
+            if word.startswith(pattern):
+                # Get the stem candidate
+                stem = word[len(pattern):]
+                
+                # Apply phonological restoration if needed
+                if prefix_group in self.phonological_rules:
+                    stem = self._restore_phonology(stem, prefix_group)
                     
-                    # Apply phonological restoration if needed
-                    if prefix_group in self.phonological_rules:
-                        stem = self._restore_phonology(stem, prefix_group)
-                        
-                    # Validate stem
-                    if len(stem) >= 3:
-                        return stem
+                # Validate stem
+                if len(stem) >= 3:
+                    return stem
                         
         return word
         
     def _remove_suffix(self, word: str) -> str:
         """Remove suffix from word"""
-        for suffix, patterns in self.suffixes.items():
-            for pattern in patterns:
-                if word.endswith(pattern) and len(word) > len(pattern) + 2:
-                    return word[:-len(pattern)]
+        for suffix, pattern in self._suffix_index.get(word[-1:], ()):
+            if word.endswith(pattern) and len(word) > len(pattern) + 2:
+                return word[:-len(pattern)]
                     
         return word
         
@@ -282,10 +319,8 @@ class IndonesianAnalyzer:
         phrase_freq = Counter(phrases)
         
         # Filter by minimum frequency
-        common_phrases = [(phrase, freq) for phrase, freq in phrase_freq.items() 
-                         if freq >= 2]
-        
-        # Sort by frequency
-        common_phrases.sort(key=lambda x: x[1], reverse=True)
+        common_phrases = ((phrase, freq) for phrase, freq in phrase_freq.items() 
+                          if freq >= 2)
         
-        return common_phrases[:50]  # Return top 50 phrases
\ No newline at end of file
+        # Top 50 phrases by frequency (partial selection, no full sort)
+        return heapq.nlargest(50, common_phrases, key=itemgetter(1))
\ No newline at end of file
@@ -1,10 +1,13 @@
 """Priority management system for learning items"""
 
+import heapq
+from collections import Counter
+from operator import attrgetter
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
-from data.models import Word, Phrase, LearningProgress, LearningStatus
+from data.models import Word, Phrase, LearningProgress, LearningStatus, TRANSLATION_FAILURE_SUFFIXES
 from data.database import Database
 
 
@@ -31,6 +34,9 @@ class PriorityItem:
     last_reviewed: Optional[str] = None
     consecutive_correct: int = 0
     review_count: int = 0
+    notes: str = ""  # 備考・注意事項
+    stem: str = ""
+    needs_translation: bool = False  # Translation failed, unregistered or untranslated
 
 
 class PriorityManager:
@@ -54,6 +60,32 @@ class PriorityManager:
             LearningStatus.MASTERED: 0.3       # Lower priority for mastered items
         }
         
+        # Full unfiltered priority list and the database write_count it was built at
+        self._list_cache: Optional[Tuple[int, List[PriorityItem]]] = None
+        
+    def get_cached_priority_list(self, limit: Optional[int] = None) -> List[PriorityItem]:
+        """Get unfiltered prioritized list, rebuilding it only after the database changed
+        
+        The full list is cached so every limit is served by slicing it.
+        """
+        if self._list_cache is None or self._list_cache[0] != self.database.write_count:
+            items = self.get_priority_list()
+            # Read after building: creating progress rows for new items bumps write_count
+            self._list_cache = (self.database.write_count, items)
+        
+        items = self._list_cache[1]
+        return items[:limit] if limit else list(items)
+    
+    def invalidate_cache(self):
+        """Drop the cached priority list, e.g. after another process changed the database"""
+        self._list_cache = None
+    
+    def has_data(self) -> bool:
+        """Check whether there is anything to prioritize without building the list"""
+        if self._list_cache and self._list_cache[1]:
+            return True
+        return self.database.has_items()
+        
     def get_priority_list(self, 
                          item_type: Optional[ItemType] = None,
                          category: Optional[str] = None,
@@ -66,11 +98,13 @@ class PriorityManager:
         # Get words if requested
         if item_type is None or item_type == ItemType.WORD:
             words = self.database.get_all_words(order_by="frequency")
+            progress_by_id = self.database.get_or_create_progress_bulk(
+                1, "word", [word.id for word in words])
             for word in words:
                 if category and word.category.value != category:
                     continue
                     
-                progress = self.database.get_or_create_progress(1, "word", word.id)
+                progress = progress_by_id[word.id]
                 
                 if status_filter and progress.status != status_filter:
                     continue
@@ -81,11 +115,13 @@ class PriorityManager:
         # Get phrases if requested
         if item_type is None or item_type == ItemType.PHRASE:
             phrases = self.database.get_all_phrases(order_by="frequency")
+            progress_by_id = self.database.get_or_create_progress_bulk(
+                1, "phrase", [phrase.id for phrase in phrases])
             for phrase in phrases:
                 if category and phrase.category.value != category:
                     continue
                     
-                progress = self.database.get_or_create_progress(1, "phrase", phrase.id)
+                progress = progress_by_id[phrase.id]
                 
                 if status_filter and progress.status != status_filter:
                     continue
@@ -93,15 +129,22 @@ class PriorityManager:
                 priority_item = self._create_priority_item(phrase, progress, ItemType.PHRASE)
                 priority_items.append(priority_item)
         
-        # Sort by learning priority
-        priority_items.sort(key=lambda x: x.learning_priority, reverse=True)
-        
-        # Apply limit
+        # Sort by learning priority, selecting only the top items when limited
         if limit:
-            priority_items = priority_items[:limit]
+            return heapq.nlargest(limit, priority_items, key=attrgetter('learning_priority'))
         
+        priority_items.sort(key=attrgetter('learning_priority'), reverse=True)
         return priority_items
     
+    def get_missing_translation_items(self, limit: Optional[int] = None) -> List[PriorityItem]:
+        """Get words that still need a translation, highest priority first"""
+        words = self.database.get_words_missing_translation(limit)
+        progress_by_id = self.database.get_or_create_progress_bulk(
+            1, "word", [word.id for word in words])
+        
+        return [self._create_priority_item(word, progress_by_id[word.id], ItemType.WORD)
+                for word in words]
+    
     def _create_priority_item(self, item, progress: LearningProgress, 
                             item_type: ItemType) -> PriorityItem:
         """Create priority item from word/phrase and progress"""
@@ -109,6 +152,9 @@ class PriorityManager:
         # Calculate learning-adjusted priority
         learning_priority = self._calculate_learning_priority(item, progress)
         
+        # Only words have notes and stems; phrases get the empty defaults
+        is_word = item_type == ItemType.WORD
+        
         return PriorityItem(
             id=item.id,
             item_type=item_type,
@@ -123,7 +169,11 @@ class PriorityManager:
             accuracy_rate=progress.accuracy_rate,
             last_reviewed=progress.last_reviewed_at.isoformat() if progress.last_reviewed_at else None,
             consecutive_correct=progress.consecutive_correct,
-            review_count=progress.review_count
+            review_count=progress.review_count,
+            notes=(item.notes or "") if is_word else "",
+            stem=item.stem if is_word else "",
+            needs_translation=(item.japanese.endswith(TRANSLATION_FAILURE_SUFFIXES) 
+                               or item.japanese == item.indonesian)
         )
     
     def _calculate_learning_priority(self, item, progress: LearningProgress) -> float:
@@ -199,45 +249,29 @@ class PriorityManager:
         
         breakdown = {}
         
-        # Get all categories
-        words = self.database.get_all_words()
-        phrases = self.database.get_all_phrases()
-        
-        all_categories = set()
-        for item in words + phrases:
-            all_categories.add(item.category.value)
+        # Count items and learning statuses per category in a single pass
+        totals = Counter()
+        status_counts = Counter()
+        for item_type, items in (("word", self.database.get_all_words()),
+                                 ("phrase", self.database.get_all_phrases())):
+            progress_by_id = self.database.get_or_create_progress_bulk(
+                1, item_type, [item.id for item in items])
+            for item in items:
+                category = item.category.value
+                progress = progress_by_id[item.id]
+                totals[category] += 1
+                status_counts[category, progress.status.value] += 1
         
         # Calculate stats for each category
-        for category in all_categories:
+        for category, total in totals.items():
             category_stats = {
-                'total': 0,
-                'not_started': 0,
-                'learning': 0,
-                'mastered': 0,
-                'mastery_rate': 0.0
+                'total': total,
+                'not_started': status_counts[category, 'not_started'],
+                'learning': status_counts[category, 'learning'],
+                'mastered': status_counts[category, 'mastered'],
+                'mastery_rate': status_counts[category, 'mastered'] / total * 100
             }
             
-            # Count words in this category
-            category_words = [w for w in words if w.category.value == category]
-            category_phrases = [p for p in phrases if p.category.value == category]
-            
-            category_stats['total'] = len(category_words) + len(category_phrases)
-            
-            # Count learning status
-            for item in category_words:
-                progress = self.database.get_or_create_progress(1, "word", item.id)
-                category_stats[progress.status.value] += 1
-            
-            for item in category_phrases:
-                progress = self.database.get_or_create_progress(1, "phrase", item.id)
-                category_stats[progress.status.value] += 1
-            
-            # Calculate mastery rate
-            if category_stats['total'] > 0:
-                category_stats['mastery_rate'] = (
-                    category_stats['mastered'] / category_stats['total'] * 100
-                )
-            
             breakdown[category] = category_stats
         
         return breakdown
@@ -1,6 +1,6 @@
 """Data layer for Indonesian Language Learning Application"""
 
 from .database import Database
-from .models import Word, Phrase, LearningProgress, TestResult
+from .models import Word, WordKey, Phrase, LearningProgress, TestResult
 
-__all__ = ['Database', 'Word', 'Phrase', 'LearningProgress', 'TestResult']
\ No newline at end of file
+__all__ = ['Database', 'Word', 'WordKey', 'Phrase', 'LearningProgress', 'TestResult']
\ No newline at end of file
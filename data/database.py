@@ -1,18 +1,25 @@
 """Database management for Indonesian Language Learning Application"""
 
 import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple, Iterator
 import json
 
 from .models import (
     Word, Phrase, LearningProgress, TestResult, 
     StudySession, UserSettings, LearningStatus, 
-    TestType, Category
+    TestType, Category, TRANSLATION_FAILURE_SUFFIXES
 )
 
 
+# LIKE patterns for japanese values ending with one of the two failure markers
+_FAILURE_LIKE_PATTERNS = tuple(f"%{suffix}" for suffix in TRANSLATION_FAILURE_SUFFIXES)
+
+# Word columns update_word_fields may set; none of them affect the priority
+_PARTIAL_UPDATE_WORD_FIELDS = frozenset({'japanese', 'notes', 'stem'})
+
 class Database:
     """Database management class"""
     
@@ -21,33 +28,59 @@ class Database:
         self.db_path = Path(db_path)
         self.connection = None
         self.cursor = None
+        # Held from connect() to disconnect(): the app calls into one Database from
+        # worker threads, and every method shares self.connection/self.cursor
+        self._lock = threading.RLock()
+        # Incremented by every write to words, phrases, learning progress or test
+        # results so callers can tell whether data derived from them is still current
+        self.write_count = 0
         
     def connect(self):
-        """Establish database connection"""
-        self.connection = sqlite3.connect(
-            self.db_path,
-            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
-        )
-        self.connection.row_factory = sqlite3.Row
-        self.cursor = self.connection.cursor()
+        """Establish database connection, holding the lock until disconnect()"""
+        self._lock.acquire()
+        try:
+            self.connection = sqlite3.connect(
+                self.db_path,
+                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+            )
+            self.connection.row_factory = sqlite3.Row
+            self.cursor = self.connection.cursor()
+            # With WAL (set in initialize) NORMAL only syncs at checkpoints, not every commit
+            self.cursor.execute('PRAGMA synchronous=NORMAL')
+        except Exception:
+            self.disconnect()
+            raise
         
     def disconnect(self):
-        """Close database connection"""
-        if self.connection:
-            self.connection.close()
+        """Close database connection and release the lock taken by connect()"""
+        try:
+            if self.connection:
+                self.connection.close()
+        finally:
+            self.connection = None
+            self.cursor = None
+            self._lock.release()
             
     def initialize(self):
         """Initialize database schema"""
         self.connect()
+        try:
+            # Write-ahead logging: commits append to the log and readers don't block
+            # writers; the mode is stored in the database file
+            self.cursor.execute('PRAGMA journal_mode=WAL')
+            
+            # Create tables
+            self._create_tables()
+            
+            # Insert default data
+            self._insert_default_data()
+            
+            self.connection.commit()
+        finally:
+            self.disconnect()
         
-        # Create tables
-        self._create_tables()
-        
-        # Insert default data
-        self._insert_default_data()
-        
-        self.connection.commit()
-        self.disconnect()
+        # Drop stale translations so they are fetched fresh from the providers
+        self.purge_expired_translations()
         
     def _create_tables(self):
         """Create database tables"""
@@ -170,6 +203,18 @@ class Database:
             )
         ''')
         
+        # Translation cache table
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS translation_cache (
+                src_text TEXT NOT NULL,
+                src TEXT NOT NULL,
+                tgt TEXT NOT NULL,
+                tgt_text TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (src, tgt, src_text)
+            )
+        ''')
+        
         # Create indexes
         self.cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_words_frequency 
@@ -181,6 +226,13 @@ class Database:
             ON words(priority DESC)
         ''')
         
+        # indonesian is UNIQUE and already indexed; with stem indexed too,
+        # "indonesian = ? OR stem = ?" lookups use both indexes instead of a scan
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_words_stem 
+            ON words(stem)
+        ''')
+        
         self.cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_phrases_frequency 
             ON phrases(frequency DESC)
@@ -221,10 +273,35 @@ class Database:
             
             word_id = self.cursor.lastrowid
             self.connection.commit()
+            self.write_count += 1
             return word_id
         finally:
             self.disconnect()
             
+    def add_words_bulk(self, words: List[Word]) -> int:
+        """Add multiple words in a single transaction"""
+        if not words:
+            return 0
+        
+        self.connect()
+        try:
+            # Words that already exist are skipped instead of aborting the batch
+            self.cursor.executemany('''
+                INSERT OR IGNORE INTO words (indonesian, japanese, stem, category, 
+                                           frequency, priority, difficulty, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(word.indonesian, word.japanese, word.stem, 
+                   word.category.value, word.frequency, 
+                   word.calculate_priority(), word.difficulty, word.notes)
+                  for word in words])
+            
+            added_count = self.cursor.rowcount
+            self.connection.commit()
+            self.write_count += 1
+            return added_count
+        finally:
+            self.disconnect()
+            
     def get_word(self, word_id: int) -> Optional[Word]:
         """Get word by ID"""
         self.connect()
@@ -252,6 +329,45 @@ class Database:
         finally:
             self.disconnect()
             
+    def iter_word_report_rows(self) -> Iterator[Tuple]:
+        """Iterate over (indonesian, japanese, notes, frequency, priority,
+        difficulty, category) tuples for all words, highest priority first
+        
+        Rows are plain tuples rather than Word objects, and come from a
+        separate connection so the shared one stays usable while the caller
+        consumes the iterator.
+        """
+        connection = sqlite3.connect(self.db_path)
+        try:
+            yield from connection.execute('''
+                SELECT indonesian, japanese, COALESCE(notes, ''), frequency,
+                       priority, difficulty, category
+                FROM words ORDER BY priority DESC
+            ''')
+        finally:
+            connection.close()
+            
+    def get_words_missing_translation(self, limit: Optional[int] = None) -> List[Word]:
+        """Get words whose translation failed, is unregistered or is untranslated"""
+        self.connect()
+        try:
+            query = '''
+                SELECT * FROM words 
+                WHERE japanese LIKE ? OR japanese LIKE ?
+                   OR japanese = indonesian
+                ORDER BY priority DESC
+            '''
+            params = _FAILURE_LIKE_PATTERNS
+            if limit:
+                query += ' LIMIT ?'
+                params += (limit,)
+            
+            self.cursor.execute(query, params)
+            rows = self.cursor.fetchall()
+            return [self._row_to_word(row) for row in rows]
+        finally:
+            self.disconnect()
+            
     def update_word(self, word: Word) -> bool:
         """Update word"""
         self.connect()
@@ -268,10 +384,57 @@ class Database:
                   word.difficulty, word.notes, word.id))
             
             self.connection.commit()
+            self.write_count += 1
             return self.cursor.rowcount > 0
         finally:
             self.disconnect()
             
+    def update_word_fields(self, word_id: int, **changes: str) -> bool:
+        """Update only the given text columns (japanese, notes, stem) of a word
+        
+        Frequency and difficulty changes go through update_word, which also
+        recalculates the priority.
+        """
+        unknown = set(changes) - _PARTIAL_UPDATE_WORD_FIELDS
+        if unknown:
+            raise ValueError(f"Cannot partially update word fields: {sorted(unknown)}")
+        if not changes:
+            return False
+        
+        assignments = ", ".join(f"{field} = ?" for field in changes)
+        self.connect()
+        try:
+            self.cursor.execute(
+                f'UPDATE words SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                (*changes.values(), word_id)
+            )
+            self.connection.commit()
+            self.write_count += 1
+            return self.cursor.rowcount > 0
+        finally:
+            self.disconnect()
+            
+    def update_translations_bulk(self, translations: List[Tuple[str, str, str]]) -> int:
+        """Update japanese and notes for (indonesian, japanese, notes) rows in a single transaction"""
+        if not translations:
+            return 0
+        
+        self.connect()
+        try:
+            self.cursor.executemany('''
+                UPDATE words 
+                SET japanese = ?, notes = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE indonesian = ?
+            ''', [(japanese, notes, indonesian) 
+                  for indonesian, japanese, notes in translations])
+            
+            updated_count = self.cursor.rowcount
+            self.connection.commit()
+            self.write_count += 1
+            return updated_count
+        finally:
+            self.disconnect()
+            
     def delete_word(self, word_id: int) -> bool:
         """Delete word"""
         self.connect()
@@ -286,6 +449,7 @@ class Database:
             self.cursor.execute('DELETE FROM words WHERE id = ?', (word_id,))
             
             self.connection.commit()
+            self.write_count += 1
             return self.cursor.rowcount > 0
         finally:
             self.disconnect()
@@ -304,6 +468,27 @@ class Database:
         finally:
             self.disconnect()
             
+    def find_existing_words(self, search_terms: List[str]) -> Set[str]:
+        """Get the search terms that already match a word's Indonesian text or stem"""
+        if not search_terms:
+            return set()
+        
+        self.connect()
+        try:
+            placeholders = ', '.join('?' * len(search_terms))
+            self.cursor.execute(f'''
+                SELECT indonesian, stem FROM words 
+                WHERE indonesian IN ({placeholders}) OR stem IN ({placeholders})
+            ''', (*search_terms, *search_terms))
+            
+            found = set()
+            for row in self.cursor.fetchall():
+                found.add(row['indonesian'])
+                found.add(row['stem'])
+            return found.intersection(search_terms)
+        finally:
+            self.disconnect()
+            
     # CRUD operations for Phrases
     def add_phrase(self, phrase: Phrase) -> int:
         """Add a new phrase"""
@@ -321,6 +506,7 @@ class Database:
             
             phrase_id = self.cursor.lastrowid
             self.connection.commit()
+            self.write_count += 1
             return phrase_id
         finally:
             self.disconnect()
@@ -387,6 +573,28 @@ class Database:
         finally:
             self.disconnect()
             
+    def get_or_create_progress_bulk(self, user_id: int, item_type: str,
+                                    item_ids: List[int]) -> Dict[int, LearningProgress]:
+        """Get or create learning progress for many items, keyed by item id"""
+        self.connect()
+        try:
+            self.cursor.executemany('''
+                INSERT OR IGNORE INTO learning_progress (user_id, item_type, item_id)
+                VALUES (?, ?, ?)
+            ''', [(user_id, item_type, item_id) for item_id in item_ids])
+            self.connection.commit()
+            if self.cursor.rowcount > 0:  # rows ignored as existing are not counted
+                self.write_count += 1
+            
+            self.cursor.execute('''
+                SELECT * FROM learning_progress
+                WHERE user_id = ? AND item_type = ?
+            ''', (user_id, item_type))
+            return {row['item_id']: self._row_to_progress(row)
+                    for row in self.cursor.fetchall()}
+        finally:
+            self.disconnect()
+            
     def update_progress(self, progress: LearningProgress) -> bool:
         """Update learning progress"""
         self.connect()
@@ -409,10 +617,55 @@ class Database:
                   progress.review_count, progress.id))
             
             self.connection.commit()
+            self.write_count += 1
             return self.cursor.rowcount > 0
         finally:
             self.disconnect()
             
+    def get_word_analysis_stats(self) -> Dict[str, Any]:
+        """Get translation, notes, category and priority level counts of words"""
+        self.connect()
+        try:
+            # All counters in a single scan of the words table
+            self.cursor.execute('''
+                SELECT COUNT(*) AS total_words,
+                       COALESCE(SUM(japanese != '' 
+                                    AND NOT (japanese LIKE ? OR japanese LIKE ?)), 0) AS translated_words,
+                       COALESCE(SUM(notes IS NOT NULL AND notes != ''), 0) AS words_with_notes,
+                       COALESCE(SUM(priority >= 7.0), 0) AS high,
+                       COALESCE(SUM(priority >= 4.0 AND priority < 7.0), 0) AS medium,
+                       COALESCE(SUM(priority < 4.0), 0) AS low
+                FROM words
+            ''', _FAILURE_LIKE_PATTERNS)
+            row = self.cursor.fetchone()
+            
+            self.cursor.execute('''
+                SELECT category, COUNT(*) AS count FROM words GROUP BY category
+            ''')
+            categories = {r['category']: r['count'] for r in self.cursor.fetchall()}
+            
+            return {
+                'total_words': row['total_words'],
+                'translated_words': row['translated_words'],
+                'words_with_notes': row['words_with_notes'],
+                'categories': categories,
+                'priority_levels': {'high': row['high'], 'medium': row['medium'], 
+                                    'low': row['low']}
+            }
+        finally:
+            self.disconnect()
+            
+    def has_items(self) -> bool:
+        """Check whether any word or phrase has been stored"""
+        self.connect()
+        try:
+            self.cursor.execute('''
+                SELECT EXISTS(SELECT 1 FROM words) OR EXISTS(SELECT 1 FROM phrases)
+            ''')
+            return bool(self.cursor.fetchone()[0])
+        finally:
+            self.disconnect()
+            
     def get_learning_stats(self, user_id: int = 1) -> Dict[str, Any]:
         """Get learning statistics"""
         self.connect()
@@ -447,6 +700,21 @@ class Database:
                     )
                 else:
                     stats[f'{item_type}s_mastery_rate'] = 0
+            
+            # Study sessions (total_time is stored in minutes) and test results
+            self.cursor.execute('''
+                SELECT COUNT(*), COALESCE(SUM(total_time), 0) FROM study_sessions
+                WHERE user_id = ?
+            ''', (user_id,))
+            stats['total_sessions'], total_time = self.cursor.fetchone()
+            stats['total_study_time'] = round(total_time)
+            
+            self.cursor.execute('''
+                SELECT COUNT(*), COALESCE(AVG(is_correct), 0) FROM test_results
+                WHERE user_id = ?
+            ''', (user_id,))
+            stats['total_tests'], correct_rate = self.cursor.fetchone()
+            stats['average_accuracy'] = correct_rate * 100
                     
             return stats
         finally:
@@ -468,21 +736,70 @@ class Database:
             
             result_id = self.cursor.lastrowid
             self.connection.commit()
+            self.write_count += 1
             return result_id
         finally:
             self.disconnect()
             
+    # Translation cache operations
+    def load_cached_translations(self) -> Dict[Tuple[str, str, str], str]:
+        """Get all cached translations keyed by (src, tgt, src_text)"""
+        self.connect()
+        try:
+            self.cursor.execute('''
+                SELECT src, tgt, src_text, tgt_text FROM translation_cache
+            ''')
+            return {(row['src'], row['tgt'], row['src_text']): row['tgt_text']
+                    for row in self.cursor.fetchall()}
+        finally:
+            self.disconnect()
+            
+    def save_cached_translation(self, text: str, source_lang: str, 
+                                target_lang: str, translation: str):
+        """Add or replace a cached translation"""
+        self.connect()
+        try:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO translation_cache (src_text, src, tgt, tgt_text)
+                VALUES (?, ?, ?, ?)
+            ''', (text, source_lang, target_lang, translation))
+            self.connection.commit()
+        finally:
+            self.disconnect()
+            
+    def save_cached_translations(self, rows: List[Tuple[str, str, str, str]]):
+        """Add or replace many (text, source_lang, target_lang, translation) rows in one commit"""
+        self.connect()
+        try:
+            self.cursor.executemany('''
+                INSERT OR REPLACE INTO translation_cache (src_text, src, tgt, tgt_text)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+            self.connection.commit()
+        finally:
+            self.disconnect()
+            
+    def purge_expired_translations(self, ttl_seconds: int = 259200) -> int:
+        """Delete cached translations older than ttl_seconds (default 72 hours)"""
+        self.connect()
+        try:
+            self.cursor.execute('''
+                DELETE FROM translation_cache
+                WHERE created_at < datetime('now', ?)
+            ''', (f'-{ttl_seconds} seconds',))
+            self.connection.commit()
+            return self.cursor.rowcount
+        finally:
+            self.disconnect()
+            
     # Helper methods
     def _row_to_word(self, row) -> Word:
         """Convert database row to Word object"""
-        # Handle notes field safely for existing data
+        # Handle notes field safely for existing data; sqlite3.Row raises
+        # IndexError for a missing column, which avoids building row.keys()
         try:
-            # Check if notes column exists and get value
-            if hasattr(row, 'keys') and 'notes' in row.keys():
-                notes = row['notes'] or ''
-            else:
-                notes = ''
-        except Exception:
+            notes = row['notes'] or ''
+        except (IndexError, KeyError):
             notes = ''
             
         return Word(
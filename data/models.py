@@ -31,6 +31,17 @@ class Category(Enum):
     DAILY = "daily"
 
 
+# Markers appended to a translation when none could be obtained
+TRANSLATION_FAILURE_SUFFIXES = ('（翻訳取得失敗）', '（翻訳未登録）')
+
+
+def _calculate_priority(frequency: int, difficulty: int) -> float:
+    """Calculate priority from frequency and difficulty (shared by Word and Phrase)"""
+    # Integer numerator and one division: a precomputed 100 / (difficulty + 1)
+    # scale can differ in the last bit and move items across priority bands
+    return (frequency * 100) / (difficulty + 1)
+
+
 @dataclass
 class Word:
     """Word model"""
@@ -49,7 +60,21 @@ class Word:
     def calculate_priority(self) -> float:
         """Calculate priority based on frequency and difficulty"""
         # Higher frequency and lower difficulty = higher priority
-        return (self.frequency * 100) / (self.difficulty + 1)
+        return _calculate_priority(self.frequency, self.difficulty)
+
+
+@dataclass(frozen=True)
+class WordKey:
+    """Immutable word content used for set/dict based deduplication
+    
+    The fields are the ones a CSV import row carries (インドネシア語, 日本語,
+    備考), so only rows that would write identical values are collapsed.
+    stem is not part of the key: it is derived from the word by the
+    analyzer, never imported, so it cannot tell two import rows apart.
+    """
+    indonesian: str
+    japanese: str = ""
+    notes: str = ""
 
 
 @dataclass
@@ -68,7 +93,7 @@ class Phrase:
     
     def calculate_priority(self) -> float:
         """Calculate priority based on frequency and difficulty"""
-        return (self.frequency * 100) / (self.difficulty + 1)
+        return _calculate_priority(self.frequency, self.difficulty)
 
 
 @dataclass
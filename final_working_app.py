@@ -3,19 +3,99 @@
 Final working version - Simple and functional
 """
 
+import os
+import csv
 import sys
+import time
+import codecs
+import random
+import difflib
+import threading
+import unicodedata
 import flet as ft
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from operator import attrgetter
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from data.database import Database
+from data.models import Word, WordKey, Category, TRANSLATION_FAILURE_SUFFIXES
 from config.settings import Settings
 from core.analyzer import IndonesianAnalyzer
-from core.priority_manager import PriorityManager
+from core.priority_manager import PriorityManager, ItemType
 from core.flashcard import FlashcardManager
 from core.test_engine import TestEngine
+from translation_service import get_translation_service
+from translation_config import load_api_keys, create_config_template
+
+def normalize_answer(text: str) -> str:
+    """Normalize a typed answer: full-width forms, accents, case and spacing"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    folded = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(folded.lower().split())
+
+def is_similar_answer(user_input: str, correct_answer: str, threshold: float = 0.8) -> bool:
+    """Check whether a typed answer is close enough to the correct one"""
+    if user_input == correct_answer:
+        return True
+    matcher = difflib.SequenceMatcher(None, user_input, correct_answer)
+    # Cheap upper bounds first; the full ratio only runs for plausible typos
+    return (matcher.real_quick_ratio() >= threshold and
+            matcher.quick_ratio() >= threshold and
+            matcher.ratio() >= threshold)
+
+def throttled_progress(render, send_update, interval: float = 0.2):
+    """Build an on_progress(done, total) callback that renders every call but
+    sends at most one update per interval (always the final one)"""
+    last_update = [0.0]
+    
+    def report(done, total):
+        render(done, total)
+        now = time.monotonic()
+        if done == total or now - last_update[0] >= interval:
+            last_update[0] = now
+            send_update()
+    return report
+
+def detect_csv_encoding(raw: bytes) -> str:
+    """Detect CSV encoding from a BOM or the first bytes of the file"""
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    
+    # No BOM: UTF-8, then Shift-JIS as saved by Japanese Excel
+    for encoding in ('utf-8-sig', 'cp932'):
+        try:
+            # Incremental decode so a character cut at the sample end is not an error
+            codecs.getincrementaldecoder(encoding)().decode(raw, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'utf-8'
+
+def detect_csv_format(file_path, sample_size: int = 65536):
+    """Detect a CSV file's encoding and delimiter from its first sample_size bytes"""
+    with open(file_path, 'rb') as f:
+        raw = f.read(sample_size)
+    
+    encoding = detect_csv_encoding(raw)
+    
+    # Sniff the delimiter from complete lines only (Excel may save tab or semicolon separated).
+    # Only the delimiter is kept: the sniffed quoting settings depend on what the sample
+    # happens to contain (e.g. doublequote is off when it has no escaped quote)
+    sample = codecs.getincrementaldecoder(encoding)(errors='replace').decode(raw, final=False)
+    last_newline = sample.rfind('\n')
+    if last_newline > 0:
+        sample = sample[:last_newline + 1]
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t').delimiter
+    except csv.Error:
+        delimiter = ','
+    return encoding, delimiter
 
 def final_working_app(page: ft.Page):
     """Final working version with all features"""
@@ -35,13 +115,37 @@ def final_working_app(page: ft.Page):
     flashcard_manager = FlashcardManager(db)
     test_engine = TestEngine(db)
     
+    # Load API keys and initialize translation service once
+    api_keys = load_api_keys()
+    translator = get_translation_service(
+        google_api_key=api_keys.get('google'),
+        deepl_api_key=api_keys.get('deepl'),
+        cache_storage=db
+    )
+    
+    # Bumped whenever the app writes words, so cached views know they are stale
+    # (the priority list cache tracks db.write_count by itself)
+    data_version = [0]
+    
+    def mark_data_changed():
+        data_version[0] += 1
+    
     # State
     current_tab = 0
     selected_files = []
+    selected_paths = set()  # paths in selected_files, for duplicate checks
+    
+    # Built tab contents stay mounted and are shown or hidden on tab switches
+    tab_cache = {}
+    tab_views = ft.Column(spacing=0)
+    tab_refreshers = {}  # tab index -> function to refresh data when shown again
     
     # Create tab buttons
     def change_tab(index):
         nonlocal current_tab
+        # Clicking the tab that is already shown changes nothing
+        if index == current_tab and index in tab_cache:
+            return
         current_tab = index
         update_content()
     
@@ -83,13 +187,15 @@ def final_working_app(page: ft.Page):
         height=700,  # 高さを増やす
         padding=20,
         border=ft.border.all(1, ft.colors.GREY_300),
-        border_radius=10
+        border_radius=10,
+        content=tab_views
     )
     
     # Tab 0: File Processing
     def create_file_tab():
         file_list_view = ft.ListView(height=150, spacing=5)
         status_text = ft.Text("準備完了", size=14)
+        progress_bar = ft.ProgressBar(value=0, visible=False)
         results_text = ft.Text("", size=12, selectable=True)
         
         analyze_button = ft.ElevatedButton(
@@ -102,9 +208,9 @@ def final_working_app(page: ft.Page):
         )
         
         def update_file_list():
-            file_list_view.controls.clear()
-            for i, file_info in enumerate(selected_files):
-                file_item = ft.ListTile(
+            # Build the rows first and replace the list contents in one assignment
+            file_list_view.controls = [
+                ft.ListTile(
                     leading=ft.Icon(ft.icons.INSERT_DRIVE_FILE),
                     title=ft.Text(file_info['name']),
                     subtitle=ft.Text(f"{file_info['size']} bytes"),
@@ -113,30 +219,35 @@ def final_working_app(page: ft.Page):
                         on_click=lambda e, idx=i: remove_file(idx)
                     )
                 )
-                file_list_view.controls.append(file_item)
+                for i, file_info in enumerate(selected_files)
+            ]
             analyze_button.disabled = len(selected_files) == 0
             page.update()
         
         def remove_file(index):
             if 0 <= index < len(selected_files):
-                selected_files.pop(index)
+                selected_paths.discard(selected_files.pop(index)['path'])
                 update_file_list()
         
         def load_sample_data(e):
             print("Loading sample data...")
             try:
                 sample_dir = Path(__file__).parent / "sample_data"
-                sample_files = list(sample_dir.glob("*.txt"))
+                # DirEntry keeps the directory listing's type info, so only the size needs a stat
+                with os.scandir(sample_dir) as entries:
+                    sample_files = [entry for entry in entries
+                                    if entry.name.endswith(".txt") and entry.is_file()]
                 selected_files.clear()
-                for file_path in sample_files:
+                selected_paths.clear()
+                for entry in sample_files:
+                    selected_paths.add(entry.path)
                     selected_files.append({
-                        'path': str(file_path),
-                        'name': file_path.name,
-                        'size': file_path.stat().st_size
+                        'path': entry.path,
+                        'name': entry.name,
+                        'size': entry.stat().st_size
                     })
-                update_file_list()
                 status_text.value = f"{len(sample_files)} 個のサンプルファイルを読み込みました"
-                page.update()
+                update_file_list()
             except Exception as ex:
                 print(f"Error: {ex}")
                 status_text.value = f"エラー: {str(ex)}"
@@ -149,15 +260,16 @@ def final_working_app(page: ft.Page):
                 if result and result.files:
                     print(f"Selected {len(result.files)} files")
                     for file in result.files:
-                        if file.path not in [f['path'] for f in selected_files]:
-                            selected_files.append({
-                                'path': file.path,
-                                'name': file.name,
-                                'size': Path(file.path).stat().st_size if Path(file.path).exists() else 0
-                            })
-                    update_file_list()
+                        if file.path in selected_paths:
+                            continue
+                        selected_paths.add(file.path)
+                        selected_files.append({
+                            'path': file.path,
+                            'name': file.name,
+                            'size': file.size or 0  # reported by the picker, no stat needed
+                        })
                     status_text.value = f"{len(result.files)} 個のファイルを追加しました"
-                    page.update()
+                    update_file_list()
                 else:
                     print("No files selected")
             
@@ -181,86 +293,105 @@ def final_working_app(page: ft.Page):
                 return
             print(f"Analyzing {len(selected_files)} files...")
             status_text.value = "分析中..."
+            analyze_button.disabled = True
+            progress_bar.value = None  # Indeterminate until translation starts
+            progress_bar.visible = True
             page.update()
             
+            # Run file reading, translation and DB writes off the UI thread
+            page.run_thread(run_analysis, list(selected_files))
+        
+        def show_translation_progress(done, total):
+            progress_bar.value = done / total if total else 1
+            status_text.value = f"翻訳中... ({done}/{total})"
+        
+        report_translation_progress = throttled_progress(show_translation_progress, page.update)
+        
+        def read_file(path):
+            return Path(path).read_text(encoding='utf-8')
+        
+        def run_analysis(files):
             try:
-                all_text = ""
-                for file_data in selected_files:
-                    with open(file_data['path'], 'r', encoding='utf-8') as f:
-                        all_text += f.read() + "\n"
-                
-                results = analyzer.analyze_text(all_text)
+                # Read the selected files, concurrently when there are enough to
+                # overlap, and count each one as it arrives instead of joining them
+                paths = [file_data['path'] for file_data in files]
+                if len(paths) <= 2:
+                    results = analyzer.analyze_texts(read_file(path) for path in paths)
+                else:
+                    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as executor:
+                        results = analyzer.analyze_texts(executor.map(read_file, paths))
                 
                 # Save to database
                 print("Saving to database...")
-                from data.models import Word, Category
-                from translation_service import get_translation_service
-                from translation_config import load_api_keys
                 
-                # Load API keys and initialize translation service
-                api_keys = load_api_keys()
-                translator = get_translation_service(
-                    google_api_key=api_keys.get('google'),
-                    deepl_api_key=api_keys.get('deepl')
+                # Collect top 20 stems that are not in the database yet
+                top_stems = results['top_stems'][:20]
+                existing_stems = db.find_existing_words([stem for stem, _ in top_stems])
+                new_stems = []
+                for stem, count in top_stems:
+                    if stem in existing_stems:
+                        print(f"Word '{stem}' already exists, skipping...")
+                        continue
+                    new_stems.append((stem, count))
+                
+                # Get Japanese translations for all new stems at once
+                print(f"Translating {len(new_stems)} words...")
+                status_text.value = f"翻訳中... (0/{len(new_stems)})"
+                progress_bar.value = 0
+                page.update()
+                translations = translator.translate_batch(
+                    [stem for stem, _ in new_stems], 'id', 'ja',
+                    on_progress=report_translation_progress
                 )
                 
-                saved_count = 0
-                for stem, count in list(results['stem_frequency'].items())[:20]:  # Save top 20 stems
-                    try:
-                        # Check if word already exists
-                        existing_words = db.search_words(stem)
-                        if existing_words:
-                            print(f"Word '{stem}' already exists, skipping...")
-                            continue
-                        
-                        # Get Japanese translation using auto-translation
-                        print(f"Translating: {stem}...")
-                        japanese_translation = translator.translate(stem, 'id', 'ja')
-                        
-                        # Create Word object
-                        word = Word(
-                            indonesian=stem,
-                            japanese=japanese_translation,
-                            stem=stem,
-                            category=Category.GENERAL,
-                            difficulty=3,
-                            frequency=count,
-                            notes=""
-                        )
-                        # Add word to database
-                        db.add_word(word)
-                        saved_count += 1
-                        print(f"Saved: {stem} -> {japanese_translation}")
-                        
-                        # Small delay to avoid rate limiting
-                        import time
-                        time.sleep(0.5)
-                        
-                    except Exception as e:
-                        print(f"Error saving {stem}: {e}")
+                status_text.value = "データベースに保存中..."
+                status_text.update()
+                
+                words = [
+                    Word(
+                        indonesian=stem,
+                        japanese=translations[stem],
+                        stem=stem,
+                        category=Category.GENERAL,
+                        difficulty=3,
+                        frequency=count,
+                        notes=""
+                    )
+                    for stem, count in new_stems
+                ]
+                
+                # Add all words to database in one transaction
+                saved_count = db.add_words_bulk(words)
+                mark_data_changed()
+                for word in words:
+                    print(f"Saved: {word.indonesian} -> {word.japanese}")
                 
                 print(f"Saved {saved_count} words to database")
                 
                 # Display results
-                output = f"""分析完了！
-
-総単語数: {results['total_words']:,}
-ユニーク単語数: {results['unique_words']:,}
-語幹数: {results['unique_stems']:,}
-
-頻出語幹 TOP 15:
-"""
-                for i, (stem, count) in enumerate(results['top_stems'][:15]):
-                    output += f"{i+1:2d}. {stem:<20} ({count:3d}回)\n"
-                
-                results_text.value = output
+                output_lines = [
+                    "分析完了！",
+                    "",
+                    f"総単語数: {results['total_words']:,}",
+                    f"ユニーク単語数: {results['unique_words']:,}",
+                    f"語幹数: {results['unique_stems']:,}",
+                    "",
+                    "頻出語幹 TOP 15:",
+                    *(f"{i+1:2d}. {stem:<20} ({count:3d}回)"
+                      for i, (stem, count) in enumerate(results['top_stems'][:15])),
+                    ""
+                ]
+                results_text.value = "\n".join(output_lines)
                 status_text.value = "分析完了！データベースに保存しました。"
-                page.update()
                 
             except Exception as error:
                 print(f"Analysis error: {error}")
                 results_text.value = f"エラー: {str(error)}"
                 status_text.value = "分析エラー"
+            finally:
+                # One update for the results, status and controls
+                analyze_button.disabled = len(selected_files) == 0
+                progress_bar.visible = False
                 page.update()
         
         analyze_button.on_click = analyze_files
@@ -287,7 +418,7 @@ def final_working_app(page: ft.Page):
                 ft.ElevatedButton(
                     "クリア",
                     icon=ft.icons.CLEAR,
-                    on_click=lambda e: (selected_files.clear(), update_file_list()),
+                    on_click=lambda e: (selected_files.clear(), selected_paths.clear(), update_file_list()),
                     bgcolor=ft.colors.RED,
                     color=ft.colors.WHITE
                 )
@@ -300,6 +431,7 @@ def final_working_app(page: ft.Page):
                 border_radius=5
             ),
             ft.Container(height=10),
+            progress_bar,
             status_text,
             analyze_button,
         ], expand=True)
@@ -325,7 +457,9 @@ def final_working_app(page: ft.Page):
     
     # Tab 1: Learning List
     def create_learning_list_tab():
-        list_view = ft.ListView(height=450, spacing=5)
+        # Rows share one height, so the client only lays out the visible ones
+        list_view = ft.ListView(height=450, spacing=5, first_item_prototype=True)
+        list_status_text = ft.Text("", size=14)
         edit_dialog = ft.AlertDialog(
             modal=True,
             title=ft.Text("翻訳を編集"),
@@ -333,59 +467,58 @@ def final_working_app(page: ft.Page):
             actions_alignment=ft.MainAxisAlignment.END,
         )
         
+        def on_edit_click(e):
+            """Open the edit dialog for the row's item (stored in the button's data)"""
+            edit_translation(e.control.data)
+        
+        def create_learning_item(item):
+            """Create list row for a learning item"""
+            # Create subtitle with notes indicator
+            subtitle_text = f"翻訳: {item.translation} | 優先度: {item.learning_priority:.1f}"
+            if item.notes:
+                subtitle_text += f" 📝"
+            
+            return ft.ListTile(
+                leading=ft.Icon(
+                    ft.icons.STAR if item.learning_priority > 5 else ft.icons.CIRCLE,
+                    color=ft.colors.YELLOW if item.learning_priority > 5 else None
+                ),
+                title=ft.Text(item.content),
+                subtitle=ft.Text(
+                    subtitle_text,
+                    # Red when the translation needs improvement
+                    color=ft.colors.RED if item.needs_translation else None
+                ),
+                trailing=ft.Row([
+                    ft.Text(f"頻度: {item.frequency}"),
+                    ft.IconButton(
+                        icon=ft.icons.EDIT,
+                        tooltip="翻訳・備考を編集",
+                        data=item,
+                        on_click=on_edit_click
+                    )
+                ], tight=True)
+            )
+        
+        shown_write_count = [None]  # db.write_count the shown list was loaded at
+        
         def load_learning_items():
-            list_view.controls.clear()
             try:
-                # Get priority items (correct method name)
-                items = priority_manager.get_priority_list(limit=50)
+                # Get priority items; the cache is rebuilt after database writes
+                shown_write_count[0] = db.write_count
+                items = priority_manager.get_cached_priority_list(limit=50)
                 
                 if not items:
-                    list_view.controls.append(
+                    list_view.controls = [
                         ft.Text("学習アイテムがありません。先にファイルを分析してください。")
-                    )
+                    ]
                 else:
-                    for item in items:
-                        # Check if translation needs improvement
-                        needs_translation = (
-                            item.translation.endswith('（翻訳取得失敗）') or 
-                            item.translation.endswith('（翻訳未登録）') or
-                            item.translation == item.content
-                        )
-                        
-                        # Create subtitle with notes indicator
-                        subtitle_text = f"翻訳: {item.translation} | 優先度: {item.learning_priority:.1f}"
-                        try:
-                            item_notes = getattr(item, 'notes', '') or ''
-                        except AttributeError:
-                            item_notes = ''
-                        if item_notes:
-                            subtitle_text += f" 📝"
-                        
-                        list_item = ft.ListTile(
-                            leading=ft.Icon(
-                                ft.icons.STAR if item.learning_priority > 5 else ft.icons.CIRCLE,
-                                color=ft.colors.YELLOW if item.learning_priority > 5 else None
-                            ),
-                            title=ft.Text(item.content),
-                            subtitle=ft.Text(
-                                subtitle_text,
-                                color=ft.colors.RED if needs_translation else None
-                            ),
-                            trailing=ft.Row([
-                                ft.Text(f"頻度: {item.frequency}"),
-                                ft.IconButton(
-                                    icon=ft.icons.EDIT,
-                                    tooltip="翻訳・備考を編集",
-                                    on_click=lambda e, word=item: edit_translation(word)
-                                )
-                            ], tight=True)
-                        )
-                        list_view.controls.append(list_item)
+                    list_view.controls = [create_learning_item(item) for item in items]
                 
                 page.update()
             except Exception as e:
                 print(f"Error loading learning items: {e}")
-                list_view.controls.append(ft.Text(f"エラー: {str(e)}"))
+                list_view.controls = [ft.Text(f"エラー: {str(e)}")]
                 page.update()
         
         def edit_translation(word_item):
@@ -406,15 +539,9 @@ def final_working_app(page: ft.Page):
                 autofocus=True
             )
             
-            # Get notes safely
-            try:
-                notes_value = getattr(word_item, 'notes', '') or ''
-            except AttributeError:
-                notes_value = ''
-                
             notes_field = ft.TextField(
                 label="備考・注意事項",
-                value=notes_value,
+                value=word_item.notes,
                 width=300,
                 multiline=True,
                 min_lines=2,
@@ -431,32 +558,21 @@ def final_working_app(page: ft.Page):
                         page.update()
                         return
                     
-                    # Update in database
-                    from data.models import Word
-                    
-                    # Find and update the word
-                    words = db.search_words(word_item.content)
-                    if words:
-                        word = words[0]
-                        # Update the word's translation and notes
-                        updated_word = Word(
-                            id=word.id,
-                            indonesian=word.indonesian,
-                            japanese=new_translation,
-                            stem=word.stem,
-                            category=word.category,
-                            difficulty=word.difficulty,
-                            frequency=word.frequency,
-                            notes=new_notes
-                        )
-                        db.update_word(updated_word)
+                    # Update the word's translation and notes by id; phrases have
+                    # no row in the words table
+                    updated = word_item.item_type == ItemType.WORD and db.update_word_fields(
+                        word_item.id, japanese=new_translation, notes=new_notes
+                    )
+                    if updated:
+                        mark_data_changed()
+                        # Later lookups of this word should return the user's translation
+                        translator.store(word_item.content, new_translation)
                         print(f"Updated: {word_item.content} -> {new_translation}")
                         if new_notes:
                             print(f"Notes: {new_notes}")
                         
-                        # Close dialog and refresh list
+                        # Close dialog and refresh list (load_learning_items updates the page)
                         page.dialog.open = False
-                        page.update()
                         load_learning_items()
                     else:
                         japanese_field.error_text = "単語が見つかりません"
@@ -493,189 +609,170 @@ def final_working_app(page: ft.Page):
             page.dialog.open = True
             page.update()
         
+        def start_auto_translate(e):
+            list_status_text.value = "自動翻訳中..."
+            auto_translate_button.disabled = True
+            page.update()
+            
+            # Translate and save off the UI thread
+            page.run_thread(auto_translate_missing)
+        
         def auto_translate_missing():
             """Auto-translate words with missing translations"""
             try:
-                from translation_service import get_translation_service
-                from translation_config import load_api_keys
+                # Get words with missing translations
+                items = priority_manager.get_missing_translation_items(limit=100)
+                missing_count = len(items)
                 
-                # Load API keys and initialize translation service
-                api_keys = load_api_keys()
-                translator = get_translation_service(
-                    google_api_key=api_keys.get('google'),
-                    deepl_api_key=api_keys.get('deepl')
-                )
+                def show_progress(done, total):
+                    list_status_text.value = f"自動翻訳中... ({done}/{total})"
                 
-                # Get words with missing translations
-                items = priority_manager.get_priority_list(limit=100)
-                missing_count = 0
-                updated_count = 0
+                report_progress = throttled_progress(show_progress, list_status_text.update)
                 
+                # Cache, local dictionary and batch requests first, then a few
+                # rate-limited per-word requests at a time
+                translations = translator.translate_batch(
+                    [item.content for item in items], 'id', 'ja',
+                    on_progress=report_progress
+                )
+                
+                updates = []
                 for item in items:
-                    if (item.translation.endswith('（翻訳取得失敗）') or 
-                        item.translation.endswith('（翻訳未登録）') or
-                        item.translation == item.content):
-                        
-                        missing_count += 1
-                        print(f"Re-translating: {item.content}...")
-                        
-                        new_translation = translator.translate(item.content, 'id', 'ja')
-                        if new_translation and new_translation != item.content:
-                            # Update in database
-                            words = db.search_words(item.content)
-                            if words:
-                                from data.models import Word
-                                word = words[0]
-                                updated_word = Word(
-                                    id=word.id,
-                                    indonesian=word.indonesian,
-                                    japanese=new_translation,
-                                    stem=word.stem,
-                                    category=word.category,
-                                    difficulty=word.difficulty,
-                                    frequency=word.frequency
-                                )
-                                db.update_word(updated_word)
-                                updated_count += 1
-                                print(f"Updated: {item.content} -> {new_translation}")
-                        
-                        # Small delay to avoid rate limiting
-                        import time
-                        time.sleep(0.5)
+                    new_translation = translations[item.content]
+                    if (new_translation and new_translation != item.content
+                            and not new_translation.endswith(TRANSLATION_FAILURE_SUFFIXES)):
+                        updates.append((item.content, new_translation, item.notes))
+                        print(f"Updated: {item.content} -> {new_translation}")
+                
+                # Save all translations in one transaction
+                updated_count = db.update_translations_bulk(updates) if updates else 0
+                if updated_count:
+                    mark_data_changed()
                 
                 print(f"Auto-translation complete: {updated_count}/{missing_count} words updated")
-                load_learning_items()
+                list_status_text.value = f"自動翻訳完了: {updated_count}/{missing_count} 語を更新"
                 
             except Exception as e:
                 print(f"Auto-translation error: {e}")
+                list_status_text.value = "自動翻訳エラー"
+            finally:
+                auto_translate_button.disabled = False
+                load_learning_items()  # Refreshes the list and updates the page once
+        
+        def start_export(e):
+            list_status_text.value = "CSV書き出し中..."
+            export_csv_button.disabled = True
+            page.update()
+            
+            # Build and write the file off the UI thread
+            page.run_thread(export_to_csv)
         
-        def export_to_csv(e):
+        def export_to_csv():
             """Export learning list to CSV for Excel editing"""
             try:
-                import csv
-                from datetime import datetime
-                
                 # Get all learning items
-                items = priority_manager.get_priority_list(limit=1000)
+                items = priority_manager.get_cached_priority_list(limit=1000)
                 if not items:
                     print("No items to export")
+                    list_status_text.value = "書き出す項目がありません"
                     return
                 
                 # Create CSV file
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 csv_path = Path(__file__).parent / f"indonesian_words_{timestamp}.csv"
                 
-                with open(csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
+                with open(csv_path, 'w', newline='', encoding='utf-8-sig',
+                          buffering=1 << 20) as csvfile:
                     writer = csv.writer(csvfile)
                     # Write header
                     writer.writerow(['インドネシア語', '日本語翻訳', '備考・注意事項', '語幹', '頻度', '優先度', '修正要否'])
                     
                     # Write data
-                    for item in items:
-                        needs_fix = (
-                            item.translation.endswith('（翻訳取得失敗）') or 
-                            item.translation.endswith('（翻訳未登録）') or
-                            item.translation == item.content
-                        )
-                        # Get notes safely
-                        try:
-                            item_notes = getattr(item, 'notes', '') or ''
-                        except AttributeError:
-                            item_notes = ''
-                            
-                        writer.writerow([
+                    writer.writerows(
+                        (
                             item.content,
                             item.translation,
-                            item_notes,  # 備考欄
-                            item.stem if hasattr(item, 'stem') else '',
+                            item.notes,  # 備考欄
+                            item.stem,
                             item.frequency,
                             f"{item.learning_priority:.1f}",
-                            "要修正" if needs_fix else "OK"
-                        ])
+                            "要修正" if item.needs_translation else "OK"
+                        )
+                        for item in items
+                    )
                 
                 print(f"✅ CSV exported: {csv_path}")
                 print(f"Exported {len(items)} words")
                 print("Excelで編集後、「CSV取り込み」ボタンで読み込んでください")
+                list_status_text.value = f"CSV書き出し完了: {len(items)} 語 ({csv_path.name})"
                 
             except Exception as ex:
                 print(f"❌ CSV export error: {ex}")
+                list_status_text.value = "CSV書き出しエラー"
+            finally:
+                export_csv_button.disabled = False
+                page.update()
         
         def import_from_csv(e):
             """Import translations from CSV file"""
             
-            def on_file_result(result):
-                if result and result.files:
-                    csv_file = result.files[0]
-                    try:
-                        import csv
-                        
-                        # Detect encoding
-                        try:
-                            import chardet
-                            with open(csv_file.path, 'rb') as f:
-                                raw_data = f.read()
-                                encoding_result = chardet.detect(raw_data)
-                                encoding = encoding_result['encoding'] or 'utf-8'
-                        except ImportError:
-                            # Fallback if chardet is not available
-                            encoding = 'utf-8-sig'
-                        
-                        print(f"Reading CSV file: {csv_file.name} (encoding: {encoding})")
-                        
-                        updated_count = 0
-                        error_count = 0
+            def run_import(csv_file):
+                """Read the CSV and update the database (runs off the UI thread)"""
+                try:
+                    # Detect encoding and delimiter from the start of the file
+                    encoding, delimiter = detect_csv_format(csv_file.path)
+                    
+                    print(f"Reading CSV file: {csv_file.name} (encoding: {encoding})")
+                    
+                    seen_rows = set()
+                    translations = []
+                    
+                    with open(csv_file.path, 'r', encoding=encoding, newline='',
+                              buffering=1 << 20) as csvfile:
+                        reader = csv.reader(csvfile, delimiter=delimiter)
+                        header = next(reader)  # Skip header
+                        print(f"CSV header: {header}")
                         
-                        with open(csv_file.path, 'r', encoding=encoding) as csvfile:
-                            reader = csv.reader(csvfile)
-                            header = next(reader)  # Skip header
-                            print(f"CSV header: {header}")
+                        for row in reader:
+                            if len(row) < 2:
+                                continue
                             
-                            for row_num, row in enumerate(reader, start=2):
-                                if len(row) < 2:
-                                    continue
-                                
-                                indonesian_word = row[0].strip()
-                                japanese_translation = row[1].strip()
-                                notes = row[2].strip() if len(row) > 2 else ''  # 備考欄
-                                
-                                if not indonesian_word or not japanese_translation:
-                                    continue
-                                
-                                try:
-                                    # Find and update the word
-                                    words = db.search_words(indonesian_word)
-                                    if words:
-                                        word = words[0]
-                                        from data.models import Word
-                                        
-                                        updated_word = Word(
-                                            id=word.id,
-                                            indonesian=word.indonesian,
-                                            japanese=japanese_translation,
-                                            stem=word.stem,
-                                            category=word.category,
-                                            difficulty=word.difficulty,
-                                            frequency=word.frequency,
-                                            notes=notes
-                                        )
-                                        db.update_word(updated_word)
-                                        updated_count += 1
-                                        print(f"Updated: {indonesian_word} -> {japanese_translation}")
-                                        if notes:
-                                            print(f"  Notes: {notes}")
-                                    else:
-                                        print(f"Word not found: {indonesian_word}")
-                                        error_count += 1
-                                        
-                                except Exception as update_error:
-                                    print(f"Error updating {indonesian_word}: {update_error}")
-                                    error_count += 1
-                        
-                        print(f"✅ CSV import complete: {updated_count} updated, {error_count} errors")
-                        load_learning_items()  # Refresh the list
-                        
-                    except Exception as ex:
-                        print(f"❌ CSV import error: {ex}")
+                            indonesian_word = row[0].strip()
+                            japanese_translation = row[1].strip()
+                            notes = row[2].strip() if len(row) > 2 else ''  # 備考欄
+                            
+                            if not indonesian_word or not japanese_translation:
+                                continue
+                            
+                            # Skip rows identical to one already imported
+                            row_key = WordKey(indonesian_word, japanese_translation, notes)
+                            if row_key in seen_rows:
+                                continue
+                            seen_rows.add(row_key)
+                            translations.append((indonesian_word, japanese_translation, notes))
+                    
+                    # Apply all rows in one transaction
+                    updated_count = db.update_translations_bulk(translations)
+                    if updated_count:
+                        mark_data_changed()
+                    error_count = len(translations) - updated_count  # words not in the database
+                    
+                    print(f"✅ CSV import complete: {updated_count} updated, {error_count} errors")
+                    list_status_text.value = f"CSV取り込み完了: {updated_count} 件更新, {error_count} 件エラー"
+                    
+                except Exception as ex:
+                    print(f"❌ CSV import error: {ex}")
+                    list_status_text.value = "CSV取り込みエラー"
+                finally:
+                    import_csv_button.disabled = False
+                    load_learning_items()  # Refreshes the list and updates the page once
+            
+            def on_file_result(result):
+                if result and result.files:
+                    list_status_text.value = "CSV取り込み中..."
+                    import_csv_button.disabled = True
+                    page.update()
+                    page.run_thread(run_import, result.files[0])
                 else:
                     print("No file selected")
             
@@ -702,7 +799,7 @@ def final_working_app(page: ft.Page):
         auto_translate_button = ft.ElevatedButton(
             "未翻訳を自動翻訳",
             icon=ft.icons.TRANSLATE,
-            on_click=lambda e: auto_translate_missing(),
+            on_click=start_auto_translate,
             bgcolor=ft.colors.ORANGE,
             color=ft.colors.WHITE
         )
@@ -710,7 +807,7 @@ def final_working_app(page: ft.Page):
         export_csv_button = ft.ElevatedButton(
             "CSV書き出し",
             icon=ft.icons.DOWNLOAD,
-            on_click=export_to_csv,
+            on_click=start_export,
             bgcolor=ft.colors.BLUE,
             color=ft.colors.WHITE
         )
@@ -723,6 +820,13 @@ def final_working_app(page: ft.Page):
             color=ft.colors.WHITE
         )
         
+        def refresh_if_changed():
+            """Reload a loaded list when the tab is shown again after database writes"""
+            if shown_write_count[0] is not None and shown_write_count[0] != db.write_count:
+                load_learning_items()
+        
+        tab_refreshers[1] = refresh_if_changed
+        
         return ft.Column([
             ft.Text("学習リスト", size=24, weight=ft.FontWeight.BOLD),
             ft.Text("優先度順の学習アイテム（赤文字は翻訳要修正）", size=14, color=ft.colors.GREY_600),
@@ -738,6 +842,7 @@ def final_working_app(page: ft.Page):
             ], spacing=10),
             ft.Text("📋 CSV編集手順: 1.書き出し → 2.Excelで翻訳編集 → 3.取り込み", 
                    size=12, color=ft.colors.GREY_600),
+            list_status_text,
             ft.Container(height=10),
             ft.Container(
                 content=list_view,
@@ -768,16 +873,57 @@ def final_working_app(page: ft.Page):
         progress_text = ft.Text("", size=14, color=ft.colors.GREY_600)
         stats_text = ft.Text("", size=14, color=ft.colors.GREY_600)
         
+        # Card face controls are built once and updated in place for each card
+        card_label = ft.Text("", size=14)
+        card_label_gap = ft.Container(height=20)
+        card_word = ft.Text("", text_align=ft.TextAlign.CENTER, color=ft.colors.BLACK)
+        card_word_gap = ft.Container(height=30)
+        card_translation = ft.Text("", size=32, weight=ft.FontWeight.BOLD, 
+                                   text_align=ft.TextAlign.CENTER, color=ft.colors.GREEN_800)
+        card_translation_gap = ft.Container(height=20)
+        card_hint = ft.Text("クリックで答えを表示", size=12, color=ft.colors.BLUE_600)
+        card_notes = ft.Text("", size=12, color=ft.colors.BLACK, text_align=ft.TextAlign.CENTER)
+        card_face = ft.Column([
+            card_label,
+            card_label_gap,
+            card_word,
+            card_word_gap,
+            card_translation,
+            card_translation_gap,
+            card_hint,
+            card_notes
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+        
+        # Session complete and empty views are built once as well
+        complete_accuracy = ft.Text("", size=20)
+        complete_counts = ft.Text("", size=16, color=ft.colors.GREY_600)
+        complete_face = ft.Column([
+            ft.Icon(ft.icons.CELEBRATION, size=80, color=ft.colors.GREEN),
+            ft.Container(height=20),
+            ft.Text("セッション完了！", size=24, weight=ft.FontWeight.BOLD),
+            ft.Container(height=20),
+            complete_accuracy,
+            complete_counts,
+            ft.Container(height=30),
+            ft.ElevatedButton(
+                "もう一度練習",
+                on_click=lambda e: load_flashcards(e),
+                bgcolor=ft.colors.BLUE,
+                color=ft.colors.WHITE
+            )
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+        no_cards_face = ft.Text("学習単語がありません。先にファイルを分析してください。", 
+                                size=16, text_align=ft.TextAlign.CENTER)
+        
         def load_flashcards(e):
             """Load flashcards from learning list"""
             nonlocal current_cards, current_index
             try:
                 # Get words from priority manager
-                items = priority_manager.get_priority_list(limit=20)  # Top 20 words
+                items = priority_manager.get_cached_priority_list(limit=20)  # Top 20 words
                 if not items:
-                    card_display.content = ft.Text("学習単語がありません。先にファイルを分析してください。", 
-                                                  size=16, text_align=ft.TextAlign.CENTER)
-                    page.update()
+                    card_display.content = no_cards_face
+                    flashcard_view.update()
                     return
                 
                 current_cards = items
@@ -787,13 +933,15 @@ def final_working_app(page: ft.Page):
                 
                 show_card()
                 update_stats()
+                flashcard_view.update()
                 print(f"Loaded {len(current_cards)} flashcards")
                 
             except Exception as ex:
                 print(f"Error loading flashcards: {ex}")
                 card_display.content = ft.Text(f"エラー: {str(ex)}", size=16, text_align=ft.TextAlign.CENTER)
-                page.update()
+                flashcard_view.update()
         
+        # Display helpers only change controls; each event handler sends one flashcard_view.update()
         def show_card():
             """Display current card (question side)"""
             nonlocal is_answer_shown
@@ -805,19 +953,22 @@ def final_working_app(page: ft.Page):
             current_card = current_cards[current_index]
             
             # Show Indonesian word (question)
-            card_display.content = ft.Column([
-                ft.Text("インドネシア語", size=14, color=ft.colors.BLUE_700),
-                ft.Container(height=20),
-                ft.Text(current_card.content, size=36, weight=ft.FontWeight.BOLD, 
-                       text_align=ft.TextAlign.CENTER, color=ft.colors.BLACK),
-                ft.Container(height=30),
-                ft.Text("クリックで答えを表示", size=12, color=ft.colors.BLUE_600),
-            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+            card_label.value = "インドネシア語"
+            card_label.color = ft.colors.BLUE_700
+            card_label_gap.height = 20
+            card_word.value = current_card.content
+            card_word.size = 36
+            card_word.weight = ft.FontWeight.BOLD
+            card_word_gap.height = 30
+            card_translation.visible = False
+            card_translation_gap.visible = False
+            card_hint.visible = True
+            card_notes.visible = False
+            card_display.content = card_face
             
             card_display.bgcolor = ft.colors.BLUE_100
             progress_text.value = f"カード {current_index + 1} / {len(current_cards)}"
             update_button_states()
-            page.update()
         
         def show_answer():
             """Display current card (answer side)"""
@@ -829,50 +980,33 @@ def final_working_app(page: ft.Page):
             current_card = current_cards[current_index]
             
             # Show Japanese translation (answer)
-            card_display.content = ft.Column([
-                ft.Text("日本語", size=14, color=ft.colors.GREEN_700),
-                ft.Container(height=10),
-                ft.Text(current_card.content, size=18, color=ft.colors.BLACK, weight=ft.FontWeight.W_500),
-                ft.Container(height=20),
-                ft.Text(current_card.translation, size=32, weight=ft.FontWeight.BOLD, 
-                       text_align=ft.TextAlign.CENTER, color=ft.colors.GREEN_800),
-                ft.Container(height=20),
-                # Show notes if available
-                ft.Text(
-                    getattr(current_card, 'notes', '') or '',
-                    size=12, 
-                    color=ft.colors.BLACK,
-                    text_align=ft.TextAlign.CENTER
-                ) if getattr(current_card, 'notes', '') else ft.Container(),
-            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+            card_label.value = "日本語"
+            card_label.color = ft.colors.GREEN_700
+            card_label_gap.height = 10
+            card_word.size = 18
+            card_word.weight = ft.FontWeight.W_500
+            card_word_gap.height = 20
+            card_translation.value = current_card.translation
+            card_translation.visible = True
+            card_translation_gap.visible = True
+            card_hint.visible = False
+            # Show notes if available
+            card_notes.value = current_card.notes
+            card_notes.visible = bool(current_card.notes)
             
             card_display.bgcolor = ft.colors.GREEN_100
             update_button_states()
-            page.update()
         
         def show_session_complete():
             """Show session completion screen"""
             accuracy = (session_stats["correct"] / session_stats["total"] * 100) if session_stats["total"] > 0 else 0
             
-            card_display.content = ft.Column([
-                ft.Icon(ft.icons.CELEBRATION, size=80, color=ft.colors.GREEN),
-                ft.Container(height=20),
-                ft.Text("セッション完了！", size=24, weight=ft.FontWeight.BOLD),
-                ft.Container(height=20),
-                ft.Text(f"正答率: {accuracy:.1f}%", size=20),
-                ft.Text(f"正解: {session_stats['correct']} / {session_stats['total']}", size=16, color=ft.colors.GREY_600),
-                ft.Container(height=30),
-                ft.ElevatedButton(
-                    "もう一度練習",
-                    on_click=load_flashcards,
-                    bgcolor=ft.colors.BLUE,
-                    color=ft.colors.WHITE
-                )
-            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+            complete_accuracy.value = f"正答率: {accuracy:.1f}%"
+            complete_counts.value = f"正解: {session_stats['correct']} / {session_stats['total']}"
+            card_display.content = complete_face
             
             card_display.bgcolor = ft.colors.WHITE
             progress_text.value = "セッション完了"
-            page.update()
         
         def on_card_click(e):
             """Handle card click (show answer or next card)"""
@@ -881,6 +1015,7 @@ def final_working_app(page: ft.Page):
                 
             if not is_answer_shown:
                 show_answer()
+                flashcard_view.update()
             # If answer is shown, wait for correct/incorrect button
         
         def mark_correct(e):
@@ -902,9 +1037,18 @@ def final_working_app(page: ft.Page):
             current_index += 1
             update_stats()
             show_card()
+            flashcard_view.update()
+        
+        last_stats_key = None  # (correct, total) currently shown in stats_text
         
         def update_stats():
             """Update statistics display"""
+            nonlocal last_stats_key
+            stats_key = (session_stats["correct"], session_stats["total"])
+            if stats_key == last_stats_key:
+                return
+            last_stats_key = stats_key
+            
             if session_stats["total"] > 0:
                 accuracy = session_stats["correct"] / session_stats["total"] * 100
                 stats_text.value = f"正答率: {accuracy:.1f}% ({session_stats['correct']}/{session_stats['total']})"
@@ -946,9 +1090,10 @@ def final_working_app(page: ft.Page):
         
         def update_button_states():
             """Update button enabled/disabled states"""
+            if correct_button.disabled == (not is_answer_shown):
+                return
             correct_button.disabled = not is_answer_shown
             incorrect_button.disabled = not is_answer_shown
-            page.update()
         
         # Initialize with welcome message
         card_display.content = ft.Column([
@@ -959,7 +1104,7 @@ def final_working_app(page: ft.Page):
             ft.Text("「学習開始」ボタンで暗記練習を始めましょう", size=14, color=ft.colors.GREY_600),
         ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
         
-        return ft.Column([
+        flashcard_view = ft.Column([
             ft.Text("フラッシュカード", size=24, weight=ft.FontWeight.BOLD),
             ft.Text("インタラクティブな暗記学習", size=14, color=ft.colors.GREY_600),
             ft.Divider(),
@@ -1009,6 +1154,7 @@ def final_working_app(page: ft.Page):
                 text_align=ft.TextAlign.CENTER
             )
         ])
+        return flashcard_view
     
     # Tab 3: Test
     def create_test_tab():
@@ -1018,6 +1164,10 @@ def final_working_app(page: ft.Page):
         test_type = "typing"  # "typing" or "choice"
         test_stats = {"correct": 0, "total": 0, "start_time": None}
         user_answer = ""
+        distractor_translations = []  # Distinct translations used as wrong choices, shuffled once
+        draw_cursor = 0  # Start of the next choice window in distractor_translations
+        advance_timer = None  # Pending move to the next question
+        current_correct_norm = ""  # Normalized answer to the current typing question
         
         # UI elements
         question_display = ft.Container(
@@ -1037,7 +1187,17 @@ def final_working_app(page: ft.Page):
             on_submit=lambda e: check_typing_answer()
         )
         
-        choice_buttons = ft.Column([])
+        # Four persistent choice buttons; show_question only changes their text and value
+        choice_values = [""] * 4
+        choice_button_list = [
+            ft.ElevatedButton(
+                width=350,
+                height=45,
+                on_click=lambda e, i=i: check_choice_answer(choice_values[i])
+            )
+            for i in range(4)
+        ]
+        choice_buttons = ft.Column(choice_button_list)
         submit_button = ft.ElevatedButton(
             "回答",
             on_click=lambda e: check_typing_answer(),
@@ -1054,90 +1214,127 @@ def final_working_app(page: ft.Page):
         progress_text = ft.Text("", size=14)
         stats_text = ft.Text("", size=14)
         
+        # Question and result controls are built once and updated in place
+        question_instruction = ft.Text("", size=14, color=ft.colors.GREY_600)
+        question_prompt = ft.Text("", size=26, weight=ft.FontWeight.BOLD, 
+                                  text_align=ft.TextAlign.CENTER, color=ft.colors.BLUE_800)
+        question_counter = ft.Text("", size=12, color=ft.colors.GREY_500)
+        question_face = ft.Column([
+            question_instruction,
+            ft.Container(height=10),
+            question_prompt,
+            question_counter
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+        
+        correct_result = ft.Container(
+            content=ft.Row([
+                ft.Icon(ft.icons.CHECK_CIRCLE, color=ft.colors.GREEN, size=30),
+                ft.Text("正解！", size=20, color=ft.colors.GREEN, weight=ft.FontWeight.BOLD)
+            ], alignment=ft.MainAxisAlignment.CENTER),
+            bgcolor=ft.colors.GREEN_100,
+            padding=15,
+            border_radius=10
+        )
+        
+        result_correct_answer = ft.Text("", size=14, color=ft.colors.BLACK)
+        result_user_answer = ft.Text("", size=14, color=ft.colors.GREY_600)
+        incorrect_result = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Icon(ft.icons.CANCEL, color=ft.colors.RED, size=30),
+                    ft.Text("不正解", size=20, color=ft.colors.RED, weight=ft.FontWeight.BOLD)
+                ], alignment=ft.MainAxisAlignment.CENTER),
+                result_correct_answer,
+                result_user_answer
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            bgcolor=ft.colors.RED_100,
+            padding=15,
+            border_radius=10
+        )
+        
         def start_test(test_mode):
             """Start test with specified mode"""
-            nonlocal test_words, current_question, test_type, test_stats
+            nonlocal test_words, current_question, test_type, test_stats, distractor_translations, draw_cursor
             
             try:
                 # Get test words
-                items = priority_manager.get_priority_list(limit=10)  # 10 questions
+                items = priority_manager.get_cached_priority_list(limit=10)  # 10 questions
                 if not items:
                     question_display.content = ft.Text("テスト用の単語がありません。先にファイルを分析してください。", 
                                                      size=16, text_align=ft.TextAlign.CENTER)
-                    page.update()
+                    test_view.update()
                     return
                 
+                cancel_advance()
                 test_words = items
                 current_question = 0
                 test_type = test_mode
-                test_stats = {"correct": 0, "total": 0, "start_time": None}
                 
-                import time
+                # Collect distinct wrong-choice candidates once per test, not per question
+                distractor_translations = list(dict.fromkeys(
+                    w.translation 
+                    for w in test_words + (priority_manager.get_cached_priority_list(limit=50) or [])
+                ))
+                random.shuffle(distractor_translations)
+                draw_cursor = 0
+                test_stats = {"correct": 0, "total": 0, "start_time": None}
                 test_stats["start_time"] = time.time()
                 
                 show_question()
                 update_ui_for_test_type()
+                test_view.update()
                 print(f"Started {test_mode} test with {len(test_words)} words")
                 
             except Exception as ex:
                 print(f"Error starting test: {ex}")
                 question_display.content = ft.Text(f"エラー: {str(ex)}", size=16, text_align=ft.TextAlign.CENTER)
-                page.update()
+                test_view.update()
         
+        # Display helpers only change controls; each event handler sends one test_view.update()
         def show_question():
             """Display current question"""
+            nonlocal current_correct_norm, draw_cursor
             if current_question >= len(test_words):
                 show_test_complete()
                 return
             
             word = test_words[current_question]
             
+            question_counter.value = f"問題 {current_question + 1} / {len(test_words)}"
+            question_display.content = question_face
+            
             if test_type == "typing":
                 # Show Japanese, ask for Indonesian
-                question_display.content = ft.Column([
-                    ft.Text("次の日本語をインドネシア語で入力してください", size=14, color=ft.colors.GREY_600),
-                    ft.Container(height=10),
-                    ft.Text(word.translation, size=26, weight=ft.FontWeight.BOLD, 
-                           text_align=ft.TextAlign.CENTER, color=ft.colors.BLUE_800),
-                    ft.Text(f"問題 {current_question + 1} / {len(test_words)}", 
-                           size=12, color=ft.colors.GREY_500)
-                ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+                question_instruction.value = "次の日本語をインドネシア語で入力してください"
+                question_prompt.value = word.translation
+                current_correct_norm = normalize_answer(word.content)
                 
             else:  # choice
                 # Show Indonesian, ask for Japanese (multiple choice)
-                import random
-                
                 # Get correct answer
                 correct_answer = word.translation
                 
-                # Generate wrong choices
-                all_words = test_words + (priority_manager.get_priority_list(limit=50) or [])
-                wrong_choices = [w.translation for w in all_words if w.translation != correct_answer]
-                wrong_choices = random.sample(wrong_choices, min(3, len(wrong_choices)))
-                
-                # Mix choices
-                choices = [correct_answer] + wrong_choices
-                random.shuffle(choices)
-                
-                question_display.content = ft.Column([
-                    ft.Text("次のインドネシア語の意味を選択してください", size=14, color=ft.colors.GREY_600),
-                    ft.Container(height=10),
-                    ft.Text(word.content, size=26, weight=ft.FontWeight.BOLD, 
-                           text_align=ft.TextAlign.CENTER, color=ft.colors.BLUE_800),
-                    ft.Text(f"問題 {current_question + 1} / {len(test_words)}", 
-                           size=12, color=ft.colors.GREY_500)
-                ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
-                
-                # Create choice buttons
-                choice_buttons.controls.clear()
-                for i, choice in enumerate(choices):
-                    btn = ft.ElevatedButton(
-                        f"{chr(65+i)}. {choice}",
-                        on_click=lambda e, selected=choice: check_choice_answer(selected),
-                        width=350,
-                        height=45
-                    )
-                    choice_buttons.controls.append(btn)
+                # Take the next four translations of the shuffled pool (wrapping around);
+                # unless the correct answer is among them, it replaces a random one
+                pool_size = len(distractor_translations)
+                choice_count = min(4, pool_size)
+                choices = [distractor_translations[(draw_cursor + k) % pool_size] 
+                           for k in range(choice_count)]
+                draw_cursor = (draw_cursor + choice_count) % pool_size
+                if correct_answer not in choices:
+                    choices[random.randrange(choice_count)] = correct_answer
+                
+                question_instruction.value = "次のインドネシア語の意味を選択してください"
+                question_prompt.value = word.content
+                
+                # Fill choice buttons (hide unused ones when there are few words)
+                for i, btn in enumerate(choice_button_list):
+                    if i < len(choices):
+                        choice_values[i] = choices[i]
+                        btn.text = f"{chr(65+i)}. {choices[i]}"
+                        btn.visible = True
+                    else:
+                        btn.visible = False
             
             # Reset input
             answer_input.value = ""
@@ -1145,41 +1342,50 @@ def final_working_app(page: ft.Page):
             
             progress_text.value = f"問題 {current_question + 1} / {len(test_words)}"
             update_stats()
-            page.update()
+        
+        def cancel_advance():
+            """Cancel a pending move to the next question"""
+            nonlocal advance_timer
+            if advance_timer:
+                advance_timer.cancel()
+                advance_timer = None
+        
+        def schedule_next_question(delay=1.5):
+            """Move to the next question after showing the result for a moment"""
+            nonlocal advance_timer
+            cancel_advance()
+            advance_timer = threading.Timer(delay, next_question)
+            advance_timer.daemon = True
+            advance_timer.start()
         
         def check_typing_answer():
             """Check typing test answer"""
-            if current_question >= len(test_words):
+            # Ignore repeated answers while the result is shown
+            if current_question >= len(test_words) or result_display.visible:
                 return
                 
-            user_input = answer_input.value.strip().lower()
-            correct_answer = test_words[current_question].content.lower()
+            user_input = answer_input.value.strip()
+            correct_answer = test_words[current_question].content
             
-            # Simple similarity check
-            import difflib
-            similarity = difflib.SequenceMatcher(None, user_input, correct_answer).ratio()
-            is_correct = similarity >= 0.8  # 80% similarity threshold
+            # Normalized exact match first, then 80% similarity threshold
+            is_correct = is_similar_answer(normalize_answer(user_input), current_correct_norm)
             
+            # Show the answer as typed; normalization is only for the comparison
             show_answer_result(is_correct, user_input, correct_answer)
             
             # Update stats
             test_stats["total"] += 1
             if is_correct:
                 test_stats["correct"] += 1
+            test_view.update()
             
             # Move to next question after delay
-            def next_after_delay():
-                import time
-                time.sleep(1.5)
-                next_question()
-            
-            # Use threading to avoid blocking UI
-            import threading
-            threading.Thread(target=next_after_delay, daemon=True).start()
+            schedule_next_question()
         
         def check_choice_answer(selected_answer):
             """Check choice test answer"""
-            if current_question >= len(test_words):
+            # Ignore repeated answers while the result is shown
+            if current_question >= len(test_words) or result_display.visible:
                 return
                 
             correct_answer = test_words[current_question].translation
@@ -1191,55 +1397,31 @@ def final_working_app(page: ft.Page):
             test_stats["total"] += 1
             if is_correct:
                 test_stats["correct"] += 1
+            test_view.update()
             
             # Move to next question after delay
-            def next_after_delay():
-                import time
-                time.sleep(1.5)
-                next_question()
-            
-            import threading
-            threading.Thread(target=next_after_delay, daemon=True).start()
+            schedule_next_question()
         
         def show_answer_result(is_correct, user_answer, correct_answer):
             """Show answer result"""
             if is_correct:
-                result_display.content = ft.Container(
-                    content=ft.Row([
-                        ft.Icon(ft.icons.CHECK_CIRCLE, color=ft.colors.GREEN, size=30),
-                        ft.Text("正解！", size=20, color=ft.colors.GREEN, weight=ft.FontWeight.BOLD)
-                    ], alignment=ft.MainAxisAlignment.CENTER),
-                    bgcolor=ft.colors.GREEN_100,
-                    padding=15,
-                    border_radius=10
-                )
+                result_display.content = correct_result
             else:
-                result_display.content = ft.Container(
-                    content=ft.Column([
-                        ft.Row([
-                            ft.Icon(ft.icons.CANCEL, color=ft.colors.RED, size=30),
-                            ft.Text("不正解", size=20, color=ft.colors.RED, weight=ft.FontWeight.BOLD)
-                        ], alignment=ft.MainAxisAlignment.CENTER),
-                        ft.Text(f"正解: {correct_answer}", size=14, color=ft.colors.BLACK),
-                        ft.Text(f"回答: {user_answer}", size=14, color=ft.colors.GREY_600)
-                    ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                    bgcolor=ft.colors.RED_100,
-                    padding=15,
-                    border_radius=10
-                )
+                result_correct_answer.value = f"正解: {correct_answer}"
+                result_user_answer.value = f"回答: {user_answer}"
+                result_display.content = incorrect_result
             
             result_display.visible = True
-            page.update()
         
         def next_question():
             """Move to next question"""
             nonlocal current_question
             current_question += 1
             show_question()
+            test_view.update()
         
         def show_test_complete():
             """Show test completion screen"""
-            import time
             elapsed_time = int(time.time() - test_stats["start_time"]) if test_stats["start_time"] else 0
             accuracy = (test_stats["correct"] / test_stats["total"] * 100) if test_stats["total"] > 0 else 0
             
@@ -1275,7 +1457,6 @@ def final_working_app(page: ft.Page):
             result_display.visible = False
             
             progress_text.value = "テスト完了"
-            page.update()
         
         def update_ui_for_test_type():
             """Update UI based on test type"""
@@ -1287,11 +1468,17 @@ def final_working_app(page: ft.Page):
                 answer_input.visible = False
                 submit_button.visible = False
                 choice_buttons.visible = True
-            
-            page.update()
+        
+        last_stats_key = None  # (correct, total) currently shown in stats_text
         
         def update_stats():
             """Update statistics display"""
+            nonlocal last_stats_key
+            stats_key = (test_stats["correct"], test_stats["total"])
+            if stats_key == last_stats_key:
+                return
+            last_stats_key = stats_key
+            
             if test_stats["total"] > 0:
                 accuracy = test_stats["correct"] / test_stats["total"] * 100
                 stats_text.value = f"正答率: {accuracy:.1f}% ({test_stats['correct']}/{test_stats['total']})"
@@ -1312,7 +1499,7 @@ def final_working_app(page: ft.Page):
         submit_button.visible = False
         choice_buttons.visible = False
         
-        return ft.Column([
+        test_view = ft.Column([
             ft.Text("テスト", size=24, weight=ft.FontWeight.BOLD),
             ft.Text("学習効果の測定とスキルチェック", size=14, color=ft.colors.GREY_600),
             ft.Divider(),
@@ -1390,17 +1577,38 @@ def final_working_app(page: ft.Page):
                 text_align=ft.TextAlign.CENTER
             )
         ])
+        return test_view
     
     # Tab 4: Progress
     def create_progress_tab():
-        stats_text = ft.Text("", size=14)
+        stats_text = ft.Text("統計を読み込み中...", size=14)
         word_stats_text = ft.Text("", size=14)
         recent_activity_text = ft.Text("", size=14)
         
-        def load_stats():
+        stats_loaded = {'version': None}  # (data_version, db.write_count) the shown stats were computed for
+        learning_stats_cache = {'write_count': None, 'stats': None}
+        
+        def load_stats(force=False):
+            """Refresh stats in the background unless the data changed since the last load"""
+            version = (data_version[0], db.write_count)
+            if stats_loaded['version'] == version and not force:
+                return
+            stats_loaded['version'] = version
+            page.run_thread(refresh_stats)
+        
+        def get_learning_stats():
+            """Run the learning stats queries only when the database was written since the last run"""
+            write_count = db.write_count
+            if learning_stats_cache['write_count'] != write_count:
+                learning_stats_cache['stats'] = db.get_learning_stats()
+                learning_stats_cache['write_count'] = write_count
+            return learning_stats_cache['stats']
+        
+        def refresh_stats():
+            """Compute and show stats (runs off the UI thread)"""
             try:
                 # Basic database stats
-                stats = db.get_learning_stats()
+                stats = get_learning_stats()
                 
                 # Word analysis stats
                 word_stats = get_word_analysis_stats()
@@ -1463,40 +1671,8 @@ def final_working_app(page: ft.Page):
         def get_word_analysis_stats():
             """Get word analysis statistics"""
             try:
-                # Get all words from database
-                words = db.get_all_words(limit=None)
-                
-                stats = {
-                    'total_words': len(words),
-                    'translated_words': 0,
-                    'words_with_notes': 0,
-                    'categories': {},
-                    'priority_levels': {'high': 0, 'medium': 0, 'low': 0}
-                }
-                
-                for word in words:
-                    # Check translation status
-                    if (word.japanese and 
-                        not word.japanese.endswith('（翻訳取得失敗）') and
-                        not word.japanese.endswith('（翻訳未登録）')):
-                        stats['translated_words'] += 1
-                    
-                    # Check notes
-                    if hasattr(word, 'notes') and word.notes:
-                        stats['words_with_notes'] += 1
-                    
-                    # Category distribution
-                    category = word.category.value if hasattr(word.category, 'value') else str(word.category)
-                    stats['categories'][category] = stats['categories'].get(category, 0) + 1
-                    
-                    # Priority level distribution
-                    priority = word.priority
-                    if priority >= 7.0:
-                        stats['priority_levels']['high'] += 1
-                    elif priority >= 4.0:
-                        stats['priority_levels']['medium'] += 1
-                    else:
-                        stats['priority_levels']['low'] += 1
+                # Counted by SQLite in one pass over the words table
+                stats = db.get_word_analysis_stats()
                 
                 # Calculate translation rate
                 stats['translation_rate'] = (stats['translated_words'] / stats['total_words'] * 100) if stats['total_words'] > 0 else 0
@@ -1517,33 +1693,36 @@ def final_working_app(page: ft.Page):
         def get_recent_activity():
             """Get recent activity summary"""
             try:
-                # Get priority words
-                priority_words = priority_manager.get_priority_list(limit=100)
-                
-                if not priority_words:
+                # Check for data before building the priority list
+                if not priority_manager.has_data():
                     return {
                         'summary': "まだ分析データがありません",
                         'top_words': "分析を実行してください",
                         'recent_words': "分析を実行してください"
                     }
                 
+                # Get priority words
+                priority_words = priority_manager.get_cached_priority_list(limit=100)
+                
                 # Create summary
                 total_words = len(priority_words)
-                avg_priority = sum(w.learning_priority for w in priority_words) / total_words if total_words > 0 else 0
+                avg_priority = sum(map(attrgetter('learning_priority'), priority_words)) / total_words
                 
                 summary = f"学習対象: {total_words:,}語 | 平均優先度: {avg_priority:.1f}"
                 
-                # Top words by frequency
-                top_words = sorted(priority_words, key=lambda w: w.frequency, reverse=True)[:5]
-                top_words_str = ""
-                for i, word in enumerate(top_words, 1):
-                    top_words_str += f"{i}. {word.content} ({word.frequency}回) - {word.translation}\\n"
+                # Top words by frequency, read through the frequency index
+                top_words = db.get_all_words(limit=5, order_by="frequency")
+                top_words_str = "\n".join(
+                    f"{i}. {word.indonesian} ({word.frequency}回) - {word.japanese}"
+                    for i, word in enumerate(top_words, 1)
+                )
                 
-                # Recent words (highest priority)
-                recent_words = sorted(priority_words, key=lambda w: w.learning_priority, reverse=True)[:5]
-                recent_words_str = ""
-                for i, word in enumerate(recent_words, 1):
-                    recent_words_str += f"{i}. {word.content} (優先度: {word.learning_priority:.1f}) - {word.translation}\\n"
+                # Recent words (highest priority); the list is already ordered by learning priority
+                recent_words = priority_words[:5]
+                recent_words_str = "\n".join(
+                    f"{i}. {word.content} (優先度: {word.learning_priority:.1f}) - {word.translation}"
+                    for i, word in enumerate(recent_words, 1)
+                )
                 
                 return {
                     'summary': summary,
@@ -1559,37 +1738,35 @@ def final_working_app(page: ft.Page):
                     'recent_words': "データ取得エラー"
                 }
         
+        def start_report_export(e):
+            report_button.disabled = True
+            report_button.update()
+            
+            # Stream the report to disk off the UI thread
+            page.run_thread(export_progress_report)
+        
         def export_progress_report():
             """Export progress report to CSV"""
             try:
-                from datetime import datetime
-                import csv
-                
-                # Get all data
-                words = db.get_all_words(limit=None)
-                priority_words = priority_manager.get_priority_list(limit=None)
+                # Stream plain rows from the database instead of loading Word objects
+                rows = db.iter_word_report_rows()
                 
                 # Create report
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 report_path = Path(__file__).parent / f"progress_report_{timestamp}.csv"
                 
-                with open(report_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
+                with open(report_path, 'w', newline='', encoding='utf-8-sig',
+                          buffering=1 << 20) as csvfile:
                     writer = csv.writer(csvfile)
                     
                     # Header
                     writer.writerow(['インドネシア語', '日本語', '備考', '頻度', '優先度', '難易度', 'カテゴリ'])
                     
                     # Data
-                    for word in words:
-                        writer.writerow([
-                            word.indonesian,
-                            word.japanese,
-                            getattr(word, 'notes', ''),
-                            word.frequency,
-                            f"{word.priority:.2f}",
-                            word.difficulty,
-                            word.category.value if hasattr(word.category, 'value') else str(word.category)
-                        ])
+                    writer.writerows(
+                        (indonesian, japanese, notes, frequency, f"{priority:.2f}", difficulty, category)
+                        for indonesian, japanese, notes, frequency, priority, difficulty, category in rows
+                    )
                 
                 print(f"✅ Progress report exported: {report_path}")
                 return True
@@ -1597,9 +1774,21 @@ def final_working_app(page: ft.Page):
             except Exception as e:
                 print(f"❌ Export error: {e}")
                 return False
+            finally:
+                report_button.disabled = False
+                report_button.update()
         
-        # Auto-load stats on tab creation
+        report_button = ft.ElevatedButton(
+            "レポート出力",
+            icon=ft.icons.DOWNLOAD,
+            on_click=start_report_export,
+            bgcolor=ft.colors.GREEN,
+            color=ft.colors.WHITE
+        )
+        
+        # Auto-load stats on tab creation and whenever the tab is shown again
         load_stats()
+        tab_refreshers[4] = load_stats
         
         return ft.Column([
             ft.Text("進捗管理", size=24, weight=ft.FontWeight.BOLD),
@@ -1611,17 +1800,11 @@ def final_working_app(page: ft.Page):
                 ft.ElevatedButton(
                     "統計更新",
                     icon=ft.icons.REFRESH,
-                    on_click=lambda e: load_stats(),
+                    on_click=lambda e: load_stats(force=True),
                     bgcolor=ft.colors.BLUE,
                     color=ft.colors.WHITE
                 ),
-                ft.ElevatedButton(
-                    "レポート出力",
-                    icon=ft.icons.DOWNLOAD,
-                    on_click=lambda e: export_progress_report(),
-                    bgcolor=ft.colors.GREEN,
-                    color=ft.colors.WHITE
-                )
+                report_button
             ], spacing=10),
             
             ft.Container(height=15),
@@ -1789,7 +1972,7 @@ def final_working_app(page: ft.Page):
                                 ft.ElevatedButton(
                                     "翻訳テスト",
                                     icon=ft.icons.TRANSLATE,
-                                    on_click=lambda e: test_translation(),
+                                    on_click=lambda e: page.run_thread(test_translation),
                                     bgcolor=ft.colors.GREEN,
                                     color=ft.colors.WHITE
                                 ),
@@ -1807,53 +1990,62 @@ def final_working_app(page: ft.Page):
     def create_config_file():
         """Create translation config file"""
         try:
-            from translation_config import create_config_template
             create_config_template()
             print("✅ 設定ファイル translation_keys.txt を作成しました")
         except Exception as e:
             print(f"❌ 設定ファイル作成エラー: {e}")
     
     def test_translation():
-        """Test translation service"""
+        """Test translation service (runs off the UI thread, it may go to the network)"""
         try:
-            from translation_service import get_translation_service
-            from translation_config import load_api_keys
-            
-            api_keys = load_api_keys()
-            translator = get_translation_service(
-                google_api_key=api_keys.get('google'),
-                deepl_api_key=api_keys.get('deepl')
-            )
-            
             test_words = ["makan", "kerja", "selamat"]
+            translations = translator.translate_batch(test_words)
             print("\n🧪 翻訳テスト結果:")
             for word in test_words:
-                translation = translator.translate(word)
-                print(f"  {word} → {translation}")
+                print(f"  {word} → {translations[word]}")
                 
         except Exception as e:
             print(f"❌ 翻訳テストエラー: {e}")
     
+    # Tab builders in tab button order
+    tab_builders = (
+        create_file_tab,
+        create_learning_list_tab,
+        create_flashcard_tab,
+        create_test_tab,
+        create_progress_tab,
+        create_settings_tab,
+    )
+    
+    def get_tab(index):
+        """Get tab content, building and mounting it only on first access"""
+        if index in tab_cache:
+            refresh = tab_refreshers.get(index)
+            if refresh:
+                refresh()
+        else:
+            tab = tab_builders[index]()
+            tab.expand = True  # fill the container like a direct child would
+            tab_cache[index] = tab
+            tab_views.controls.append(tab)
+        return tab_cache[index]
+    
     # Update content based on current tab
     def update_content():
-        if current_tab == 0:
-            content_container.content = create_file_tab()
-        elif current_tab == 1:
-            content_container.content = create_learning_list_tab()
-        elif current_tab == 2:
-            content_container.content = create_flashcard_tab()
-        elif current_tab == 3:
-            content_container.content = create_test_tab()
-        elif current_tab == 4:
-            content_container.content = create_progress_tab()
-        elif current_tab == 5:
-            content_container.content = create_settings_tab()
+        shown = get_tab(current_tab)
+        
+        # Toggle visibility so revisited tabs are not re-sent to the client
+        for tab in tab_views.controls:
+            tab.visible = tab is shown
         
         # Update button colors
-        for i, button in enumerate(tab_buttons.controls):
-            button.bgcolor = ft.colors.BLUE if i == current_tab else None
+        for button in tab_buttons.controls:
+            button.bgcolor = None
+        tab_buttons.controls[current_tab].bgcolor = ft.colors.BLUE
         
-        page.update()
+        # Only send the changed parts instead of diffing the whole page
+        content_container.update()
+        tab_buttons.update()
     
     # Main layout
     page.add(
@@ -298,6 +298,10 @@ INDONESIAN_JAPANESE_DICT = {
     "komputer": "コンピューター",
 }
 
+# Affixes stripped when a word is not in the dictionary as-is, tried in order
+_PREFIXES = ('me', 'ber', 'ter', 'di', 'pe', 'se', 'ke')
+_SUFFIXES = ('kan', 'an', 'i', 'nya', 'lah', 'kah')
+
 def get_japanese_translation(indonesian_word: str) -> str:
     """Get Japanese translation for Indonesian word"""
     # Remove common prefixes and suffixes for better matching
@@ -307,21 +311,21 @@ def get_japanese_translation(indonesian_word: str) -> str:
     if stem in INDONESIAN_JAPANESE_DICT:
         return INDONESIAN_JAPANESE_DICT[stem]
     
-    # Try without common prefixes
-    prefixes = ['me', 'ber', 'ter', 'di', 'pe', 'se', 'ke']
-    for prefix in prefixes:
-        if stem.startswith(prefix) and len(stem) > len(prefix) + 2:
-            root = stem[len(prefix):]
-            if root in INDONESIAN_JAPANESE_DICT:
-                return INDONESIAN_JAPANESE_DICT[root]
+    # Try without common prefixes (one tuple check skips words with none)
+    if stem.startswith(_PREFIXES):
+        for prefix in _PREFIXES:
+            if stem.startswith(prefix) and len(stem) > len(prefix) + 2:
+                root = stem[len(prefix):]
+                if root in INDONESIAN_JAPANESE_DICT:
+                    return INDONESIAN_JAPANESE_DICT[root]
     
     # Try without common suffixes
-    suffixes = ['kan', 'an', 'i', 'nya', 'lah', 'kah']
-    for suffix in suffixes:
-        if stem.endswith(suffix) and len(stem) > len(suffix) + 2:
-            root = stem[:-len(suffix)]
-            if root in INDONESIAN_JAPANESE_DICT:
-                return INDONESIAN_JAPANESE_DICT[root]
+    if stem.endswith(_SUFFIXES):
+        for suffix in _SUFFIXES:
+            if stem.endswith(suffix) and len(stem) > len(suffix) + 2:
+                root = stem[:-len(suffix)]
+                if root in INDONESIAN_JAPANESE_DICT:
+                    return INDONESIAN_JAPANESE_DICT[root]
     
     # Return placeholder if not found
     return f"{indonesian_word}（翻訳未登録）"
\ No newline at end of file
@@ -113,6 +113,206 @@ def test_core_functionality():
         print(f"✗ Core functionality test failed: {e}")
         return False
 
+def test_database_bulk_operations():
+    """Test bulk word writes, word lookups, analysis stats and the translation cache"""
+    print("\n=== Database Bulk Operation Tests ===")
+    
+    import sqlite3
+    import tempfile
+    
+    try:
+        from data.database import Database
+        from data.models import Word, Category
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, "test.db"))
+            db.initialize()
+            
+            # INSERT OR IGNORE: existing words and repeats in the batch are skipped
+            print("Testing add_words_bulk...")
+            db.add_word(Word(indonesian="makan", japanese="食べる", stem="makan"))
+            added = db.add_words_bulk([
+                Word(indonesian="makan", japanese="上書きされない", stem="makan"),
+                Word(indonesian="minum", japanese="飲む", stem="minum"),
+                Word(indonesian="minum", japanese="飲む", stem="minum"),
+                Word(indonesian="bekerja", japanese="働く", stem="kerja"),
+            ])
+            assert added == 2, added
+            words = {word.indonesian: word for word in db.get_all_words()}
+            assert words["makan"].japanese == "食べる"
+            assert db.add_words_bulk([]) == 0
+            print("✓ add_words_bulk skips duplicates")
+            
+            print("Testing find_existing_words...")
+            found = db.find_existing_words(["makan", "kerja", "tidur"])
+            assert found == {"makan", "kerja"}, found
+            assert db.find_existing_words([]) == set()
+            print("✓ find_existing_words matches words and stems")
+            
+            print("Testing update_translations_bulk...")
+            updated = db.update_translations_bulk([
+                ("minum", "飲む（更新）", "備考"),
+                ("tidak_ada", "存在しない", ""),
+            ])
+            assert updated == 1, updated
+            minum = next(word for word in db.get_all_words() if word.indonesian == "minum")
+            assert (minum.japanese, minum.notes) == ("飲む（更新）", "備考")
+            print("✓ update_translations_bulk counts only existing words")
+            
+            # Aggregate stats must match the per-word loop they replaced; with
+            # frequency 1 these difficulties give priorities 7.14, 6.67, 4.0 and 1.0
+            print("Testing get_word_analysis_stats...")
+            db.add_words_bulk([
+                Word(indonesian="a1", japanese="", stem="a1", frequency=1, difficulty=13),
+                Word(indonesian="a2", japanese="a2（翻訳取得失敗）", stem="a2",
+                     frequency=1, difficulty=14, category=Category.BUSINESS),
+                Word(indonesian="a3", japanese="a3（翻訳未登録）", stem="a3",
+                     frequency=1, difficulty=24, notes="メモ"),
+                Word(indonesian="a4", japanese="四", stem="a4", frequency=1, difficulty=99,
+                     category=Category.TECHNICAL),
+            ])
+            expected = {'total_words': 0, 'translated_words': 0, 'words_with_notes': 0,
+                        'categories': {}, 'priority_levels': {'high': 0, 'medium': 0, 'low': 0}}
+            for word in db.get_all_words():
+                expected['total_words'] += 1
+                if (word.japanese and not word.japanese.endswith('（翻訳取得失敗）')
+                        and not word.japanese.endswith('（翻訳未登録）')):
+                    expected['translated_words'] += 1
+                if word.notes:
+                    expected['words_with_notes'] += 1
+                category = word.category.value
+                expected['categories'][category] = expected['categories'].get(category, 0) + 1
+                if word.priority >= 7.0:
+                    expected['priority_levels']['high'] += 1
+                elif word.priority >= 4.0:
+                    expected['priority_levels']['medium'] += 1
+                else:
+                    expected['priority_levels']['low'] += 1
+            stats = db.get_word_analysis_stats()
+            assert stats == expected, (stats, expected)
+            print("✓ get_word_analysis_stats matches a per-word count")
+            
+            print("Testing translation cache storage...")
+            db.save_cached_translation("rumah", "id", "ja", "家")
+            db.save_cached_translations([("air", "id", "ja", "水"), ("rumah", "id", "ja", "住宅")])
+            assert db.load_cached_translations() == {
+                ("id", "ja", "rumah"): "住宅", ("id", "ja", "air"): "水"}
+                
+            # Entries older than the 72 hour TTL are purged
+            connection = sqlite3.connect(db.db_path)
+            connection.execute(
+                "UPDATE translation_cache SET created_at = datetime('now', '-73 hours') "
+                "WHERE src_text = 'air'")
+            connection.commit()
+            connection.close()
+            assert db.purge_expired_translations() == 1
+            assert db.load_cached_translations() == {("id", "ja", "rumah"): "住宅"}
+            print("✓ Translation cache saves, replaces and purges entries")
+            
+        return True
+        
+    except Exception as e:
+        print(f"✗ Database bulk operation test failed: {e!r}")
+        return False
+
+def test_translation_batching():
+    """Test batch translation chunking and cache write-through (no network)"""
+    print("\n=== Translation Batching Tests ===")
+    
+    import tempfile
+    
+    try:
+        import requests  # noqa: F401
+    except ImportError as e:
+        print(f"⚠ Translation tests skipped (requests not installed): {e}")
+        return True
+        
+    try:
+        import translation_service
+        from translation_service import (TranslationService, TranslationCache,
+                                         GoogleTranslateAPI, DeepLAPI)
+        from data.database import Database
+        
+        class FakeResponse:
+            def __init__(self, payload):
+                self.status_code = 200
+                self.payload = payload
+                
+            def json(self):
+                return self.payload
+                
+        class FakeSession:
+            """Records the number of texts per request and echoes them back"""
+            def __init__(self):
+                self.request_sizes = []
+                
+            def post(self, url, headers=None, data=None, timeout=None):
+                if 'deepl' in url:
+                    texts = data['text']
+                    payload = {'translations': [{'text': f"{t}!"} for t in texts]}
+                else:
+                    texts = data['q']
+                    payload = {'data': {'translations': [{'translatedText': f"{t}!"}
+                                                         for t in texts]}}
+                self.request_sizes.append(len(texts))
+                return FakeResponse(payload)
+                
+        texts = [f"kata{i}" for i in range(300)]
+        
+        print("Testing keyed API batch chunking...")
+        for api_class, limit in ((DeepLAPI, 50), (GoogleTranslateAPI, 128)):
+            session = FakeSession()
+            results = api_class("key", session).translate_batch(texts)
+            assert results == [f"{t}!" for t in texts]
+            assert max(session.request_sizes) == limit, session.request_sizes
+            assert sum(session.request_sizes) == len(texts)
+        print("✓ DeepL and Google batches stay within 50 and 128 texts per request")
+        
+        # Each 1000 character text is sent on its own; the one whose reply comes
+        # back with an extra line is dropped instead of misaligning the results
+        print("Testing free Google batch line check...")
+        service = TranslationService()
+        
+        def fake_free_translate(text, source_lang, target_lang, keep_lines=False):
+            return text.upper() + ("\nextra" if text.startswith("b") else "")
+            
+        service._google_translate_free = fake_free_translate
+        long_texts = ["a" * 1000, "b" * 1000, "c" * 1000]
+        assert translation_service.GOOGLE_FREE_BATCH_CHARS < 2002
+        results = service._google_translate_free_batch(long_texts, "id", "ja")
+        assert results == ["A" * 1000, None, "C" * 1000], [r and r[:3] for r in results]
+        print("✓ Chunks with a different line count are discarded")
+        
+        print("Testing translate_batch cache write-through...")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, "test.db"))
+            db.initialize()
+            service = TranslationService(cache=TranslationCache(db))
+            service.batch_providers = {
+                'fake': lambda batch, sl, tl: [None if t == "gagal" else f"{t}!" for t in batch]}
+            service.batch_order = ['fake']
+            service.network_fallback_order = []
+            
+            translations = service.translate_batch(["makan", "Zzkata", "gagal"])
+            assert translations["makan"] == "食べる"  # local dictionary
+            assert translations["Zzkata"] == "zzkata!"
+            assert translations["gagal"] == "gagal（翻訳取得失敗）"
+            
+            # Successes are stored, failures are left out so they are retried
+            assert db.load_cached_translations() == {
+                ("id", "ja", "makan"): "食べる", ("id", "ja", "zzkata"): "zzkata!"}
+                
+            # A fresh cache loads them back from the database
+            service = TranslationService(cache=TranslationCache(db))
+            assert service.cache.get("zzkata", "id", "ja") == "zzkata!"
+        print("✓ translate_batch writes new translations through to the database")
+        
+        return True
+        
+    except Exception as e:
+        print(f"✗ Translation batching test failed: {e!r}")
+        return False
+
 def test_file_structure():
     """Test project file structure"""
     print("\n=== File Structure Tests ===")
@@ -191,7 +391,9 @@ def main():
         test_file_structure,
         test_requirements,
         test_imports,
-        test_core_functionality
+        test_core_functionality,
+        test_database_bulk_operations,
+        test_translation_batching
     ]
     
     results = []
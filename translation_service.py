@@ -4,15 +4,68 @@ Translation service using multiple APIs
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from typing import Optional, Dict
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional, Dict, List, Tuple
 from indonesian_dictionary import get_japanese_translation, INDONESIAN_JAPANESE_DICT
 
+# Longest newline-joined text sent in one free Google Translate request
+GOOGLE_FREE_BATCH_CHARS = 1500
+
+class TranslationCache:
+    """In-memory translation cache with optional persistent storage
+    
+    storage must provide load_cached_translations(),
+    save_cached_translation(text, source_lang, target_lang, translation) and
+    save_cached_translations(rows) taking such tuples, e.g.
+    data.database.Database.
+    """
+    
+    def __init__(self, storage=None):
+        self.storage = storage
+        self._memory: Dict[Tuple[str, str, str], str] = {}
+        if storage:
+            try:
+                self._memory.update(storage.load_cached_translations())
+            except Exception as e:
+                print(f"Translation cache load error: {e}")
+    
+    def get(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        """Get cached translation"""
+        return self._memory.get((source_lang, target_lang, text))
+    
+    def put(self, text: str, source_lang: str, target_lang: str, translation: str):
+        """Store translation in memory and write it through to storage"""
+        self._memory[(source_lang, target_lang, text)] = translation
+        if self.storage:
+            try:
+                self.storage.save_cached_translation(text, source_lang, target_lang, translation)
+            except Exception as e:
+                print(f"Translation cache write error: {e}")
+    
+    def put_many(self, entries: List[Tuple[str, str]], source_lang: str, target_lang: str):
+        """Store (text, translation) pairs in memory and write them to storage at once"""
+        if not entries:
+            return
+        for text, translation in entries:
+            self._memory[(source_lang, target_lang, text)] = translation
+        if self.storage:
+            try:
+                self.storage.save_cached_translations(
+                    [(text, source_lang, target_lang, translation) 
+                     for text, translation in entries])
+            except Exception as e:
+                print(f"Translation cache write error: {e}")
+
 
 class TranslationService:
     """Multi-provider translation service"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[TranslationCache] = None):
+        self.cache = cache
         self.providers = {
             'local': self._local_translate,
             'google_free': self._google_translate_free,
@@ -22,6 +75,44 @@ class TranslationService:
         
         # Fallback order
         self.fallback_order = ['local', 'google_free', 'mymemory', 'libretranslate']
+        
+        # Providers that translate a list of texts in a single request
+        self.batch_providers = {'google_free_batch': self._google_translate_free_batch}
+        self.batch_order = ['google_free_batch']
+        
+        # Per-word providers tried after the local dictionary and batch providers
+        self.network_fallback_order = self.fallback_order[1:]
+        
+        # Maximum concurrent per-word network requests in batch mode (rate limiting)
+        self.max_concurrent_requests = 5
+        
+        # Per-word network requests are spaced at least this far apart across threads
+        self.min_request_interval = 0.1
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
+        # Shared HTTP session so connections are kept alive between requests; each
+        # provider host keeps enough pooled connections for every concurrent request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.max_concurrent_requests)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def add_api_provider(self, name: str, translate_func: Callable, batch_func: Callable):
+        """Register a keyed API provider with the highest network priority"""
+        self.providers[name] = translate_func
+        self.batch_providers[name] = batch_func
+        self.fallback_order.insert(1, name)  # High priority, right after local dictionary
+        self.batch_order.insert(0, name)
+        
+        # Texts a batch request failed for still get a per-word try with every provider
+        self.network_fallback_order = self.fallback_order[1:]
+    
+    def store(self, text: str, translation: str, 
+              source_lang: str = 'id', target_lang: str = 'ja'):
+        """Record a known translation (e.g. a user correction), replacing any cached one"""
+        if self.cache and text:
+            self.cache.put(text.strip().lower(), source_lang, target_lang, translation)
     
     def translate(self, text: str, source_lang: str = 'id', target_lang: str = 'ja') -> str:
         """Translate text using fallback providers"""
@@ -32,10 +123,108 @@ class TranslationService:
         
         text = text.strip().lower()
         
-        # Try each provider in order
-        for provider_name in self.fallback_order:
+        if self.cache:
+            cached = self.cache.get(text, source_lang, target_lang)
+            if cached:
+                return cached
+        
+        result = self._translate_with(text, source_lang, target_lang, self.fallback_order)
+        if result:
+            if self.cache:
+                self.cache.put(text, source_lang, target_lang, result)
+            return result
+        
+        # If all fail, return original with indicator
+        return f"{text}（翻訳取得失敗）"
+    
+    def translate_batch(self, texts: List[str], source_lang: str = 'id', 
+                        target_lang: str = 'ja',
+                        on_progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, str]:
+        """Translate multiple texts, sending one request per batch provider
+        
+        on_progress is called with (done, total) as texts are translated.
+        """
+        results = {}
+        pending = {}  # normalized text -> original texts
+        
+        for text in texts:
+            if not text or len(text.strip()) < 2:
+                results[text] = text
+            else:
+                pending.setdefault(text.strip().lower(), []).append(text)
+        
+        total = len(pending)
+        new_entries = []  # (normalized, translation) to cache, written once at the end
+        
+        def resolve(normalized: str, translation: str, cache: bool = True):
+            for original in pending.pop(normalized):
+                results[original] = translation
+            if cache:
+                new_entries.append((normalized, translation))
+            if on_progress:
+                on_progress(total - len(pending), total)
+        
+        # Previously translated texts
+        if self.cache:
+            for normalized in list(pending):
+                cached = self.cache.get(normalized, source_lang, target_lang)
+                if cached:
+                    resolve(normalized, cached, cache=False)
+        
+        # Local dictionary (no network, Indonesian to Japanese only)
+        if source_lang == 'id' and target_lang == 'ja':
+            for normalized in list(pending):
+                result = self._local_translate(normalized, source_lang, target_lang)
+                if result and result != normalized:
+                    print(f"Translation: {normalized} -> {result} (via local)")
+                    resolve(normalized, result)
+        
+        # One request for all remaining texts per batch provider
+        for provider_name in self.batch_order:
+            if not pending:
+                break
+            batch = list(pending)
+            try:
+                translations = self.batch_providers[provider_name](batch, source_lang, target_lang)
+            except Exception as e:
+                print(f"Batch translation error with {provider_name}: {e}")
+                continue
+            
+            for normalized, result in zip(batch, translations or []):
+                if result and result != normalized:
+                    print(f"Translation: {normalized} -> {result} (via {provider_name})")
+                    resolve(normalized, result)
+        
+        # Fall back to per-word providers for anything left, a few requests at a time
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+                futures = {
+                    executor.submit(self._translate_with, normalized, source_lang, 
+                                    target_lang, self.network_fallback_order): normalized
+                    for normalized in pending
+                }
+                for future in as_completed(futures):
+                    normalized = futures[future]
+                    result = future.result()
+                    if result:
+                        resolve(normalized, result)
+                    else:
+                        # Failures are not cached so they are retried next time
+                        resolve(normalized, f"{normalized}（翻訳取得失敗）", cache=False)
+        
+        if self.cache:
+            self.cache.put_many(new_entries, source_lang, target_lang)
+        
+        return results
+    
+    def _translate_with(self, text: str, source_lang: str, target_lang: str,
+                        provider_names: List[str]) -> Optional[str]:
+        """Try the given providers in order and return the first translation"""
+        for provider_name in provider_names:
             try:
                 provider = self.providers[provider_name]
+                if provider_name != 'local':
+                    self._wait_for_request_slot()
                 result = provider(text, source_lang, target_lang)
                 
                 if result and result != text:
@@ -46,8 +235,16 @@ class TranslationService:
                 print(f"Translation error with {provider_name}: {e}")
                 continue
         
-        # If all fail, return original with indicator
-        return f"{text}（翻訳取得失敗）"
+        return None
+    
+    def _wait_for_request_slot(self):
+        """Block until min_request_interval has passed since the previous network request"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_request_interval
+        if wait > 0:
+            time.sleep(wait)
     
     def _local_translate(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
         """Use local dictionary"""
@@ -57,8 +254,13 @@ class TranslationService:
                 return result
         return None
     
-    def _google_translate_free(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
-        """Google Translate (free web scraping - may be rate limited)"""
+    def _google_translate_free(self, text: str, source_lang: str, target_lang: str,
+                               keep_lines: bool = False) -> Optional[str]:
+        """Google Translate (free web scraping - may be rate limited)
+        
+        With keep_lines the translated segments of a multi-line text are
+        joined back together instead of returning only the first one.
+        """
         try:
             # Note: This is a simple approach, may need User-Agent headers
             url = f"https://translate.googleapis.com/translate_a/single"
@@ -74,11 +276,13 @@ class TranslationService:
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
             }
             
-            response = requests.get(url, params=params, headers=headers, timeout=5)
+            response = self.session.get(url, params=params, headers=headers, timeout=5)
             
             if response.status_code == 200:
                 result = json.loads(response.text)
                 if result and result[0] and result[0][0]:
+                    if keep_lines:
+                        return "".join(segment[0] for segment in result[0] if segment[0])
                     return result[0][0][0]
                     
         except Exception as e:
@@ -86,6 +290,37 @@ class TranslationService:
         
         return None
     
+    def _google_translate_free_batch(self, texts: List[str], source_lang: str, 
+                                     target_lang: str) -> List[Optional[str]]:
+        """Google Translate (free) for many texts, one line per text in each request
+        
+        Texts are joined with newlines into requests of at most
+        GOOGLE_FREE_BATCH_CHARS characters and the translation is split back
+        into lines. A request whose line count comes back different is
+        discarded (None for each of its texts) so those texts fall back to
+        per-word providers instead of being misaligned.
+        """
+        results: List[Optional[str]] = []
+        chunk: List[str] = []
+        chunk_chars = 0
+        
+        def flush():
+            translated = self._google_translate_free("\n".join(chunk), source_lang, target_lang, 
+                                                     keep_lines=True)
+            lines = translated.split("\n") if translated else []
+            results.extend(lines if len(lines) == len(chunk) else [None] * len(chunk))
+        
+        for text in texts:
+            if chunk and chunk_chars + len(text) + 1 > GOOGLE_FREE_BATCH_CHARS:
+                flush()
+                chunk, chunk_chars = [], 0
+            chunk.append(text)
+            chunk_chars += len(text) + 1
+        if chunk:
+            flush()
+        
+        return [line.strip() if line else None for line in results]
+    
     def _mymemory_translate(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
         """MyMemory Translation API (free tier)"""
         try:
@@ -95,7 +330,7 @@ class TranslationService:
                 'langpair': f'{source_lang}|{target_lang}'
             }
             
-            response = requests.get(url, params=params, timeout=5)
+            response = self.session.get(url, params=params, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -122,7 +357,7 @@ class TranslationService:
             
             headers = {'Content-Type': 'application/json'}
             
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            response = self.session.post(url, json=data, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
@@ -137,8 +372,13 @@ class TranslationService:
 class GoogleTranslateAPI:
     """Google Cloud Translation API (requires API key)"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Most text segments the v2 API accepts in one request
+    MAX_BATCH_TEXTS = 128
+    
+    def __init__(self, api_key: Optional[str] = None, 
+                 session: Optional[requests.Session] = None):
         self.api_key = api_key
+        self.session = session or requests.Session()
         self.base_url = "https://translation.googleapis.com/language/translate/v2"
     
     def translate(self, text: str, target_lang: str = 'ja', source_lang: str = 'id') -> Optional[str]:
@@ -156,7 +396,7 @@ class GoogleTranslateAPI:
                 'source': source_lang
             }
             
-            response = requests.post(url, data=data, timeout=10)
+            response = self.session.post(url, data=data, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
@@ -169,13 +409,61 @@ class GoogleTranslateAPI:
             print(f"Google Cloud Translate error: {e}")
         
         return None
+    
+    def translate_batch(self, texts: List[str], target_lang: str = 'ja', 
+                        source_lang: str = 'id') -> Optional[List[Optional[str]]]:
+        """Translate multiple texts, MAX_BATCH_TEXTS per Google Cloud Translation API request
+        
+        Texts of a request that fails get None so they stay aligned with texts.
+        """
+        if not self.api_key:
+            print("Google Cloud API key not provided")
+            return None
+        
+        results: List[Optional[str]] = []
+        for start in range(0, len(texts), self.MAX_BATCH_TEXTS):
+            chunk = texts[start:start + self.MAX_BATCH_TEXTS]
+            results.extend(self._translate_chunk(chunk, target_lang, source_lang) 
+                           or [None] * len(chunk))
+        return results
+    
+    def _translate_chunk(self, texts: List[str], target_lang: str, 
+                         source_lang: str) -> Optional[List[str]]:
+        """Translate up to MAX_BATCH_TEXTS texts in one request"""
+        try:
+            url = f"{self.base_url}?key={self.api_key}"
+            
+            data = {
+                'q': texts,
+                'target': target_lang,
+                'source': source_lang
+            }
+            
+            response = self.session.post(url, data=data, timeout=10)
+            
+            if response.status_code == 200:
+                result = response.json()
+                if 'data' in result and 'translations' in result['data']:
+                    return [t['translatedText'] for t in result['data']['translations']]
+            else:
+                print(f"Google API error: {response.status_code}")
+                
+        except Exception as e:
+            print(f"Google Cloud Translate error: {e}")
+        
+        return None
 
 
 class DeepLAPI:
     """DeepL Translation API (requires API key)"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Most texts the API accepts in one request
+    MAX_BATCH_TEXTS = 50
+    
+    def __init__(self, api_key: Optional[str] = None, 
+                 session: Optional[requests.Session] = None):
         self.api_key = api_key
+        self.session = session or requests.Session()
         self.base_url = "https://api-free.deepl.com/v2/translate"  # Free tier
         # For Pro: "https://api.deepl.com/v2/translate"
     
@@ -197,7 +485,7 @@ class DeepLAPI:
                 'source_lang': source_lang
             }
             
-            response = requests.post(self.base_url, headers=headers, data=data, timeout=10)
+            response = self.session.post(self.base_url, headers=headers, data=data, timeout=10)
             
             if response.status_code == 200:
                 result = response.json()
@@ -210,24 +498,81 @@ class DeepLAPI:
             print(f"DeepL API error: {e}")
         
         return None
+    
+    def translate_batch(self, texts: List[str], target_lang: str = 'JA', 
+                        source_lang: str = 'ID') -> Optional[List[Optional[str]]]:
+        """Translate multiple texts, MAX_BATCH_TEXTS per DeepL API request
+        
+        Texts of a request that fails get None so they stay aligned with texts.
+        """
+        if not self.api_key:
+            print("DeepL API key not provided")
+            return None
+        
+        results: List[Optional[str]] = []
+        for start in range(0, len(texts), self.MAX_BATCH_TEXTS):
+            chunk = texts[start:start + self.MAX_BATCH_TEXTS]
+            results.extend(self._translate_chunk(chunk, target_lang, source_lang) 
+                           or [None] * len(chunk))
+        return results
+    
+    def _translate_chunk(self, texts: List[str], target_lang: str, 
+                         source_lang: str) -> Optional[List[str]]:
+        """Translate up to MAX_BATCH_TEXTS texts in one request"""
+        try:
+            headers = {
+                'Authorization': f'DeepL-Auth-Key {self.api_key}',
+                'Content-Type': 'application/x-www-form-urlencoded'
+            }
+            
+            data = {
+                'text': texts,
+                'target_lang': target_lang,
+                'source_lang': source_lang
+            }
+            
+            response = self.session.post(self.base_url, headers=headers, data=data, timeout=10)
+            
+            if response.status_code == 200:
+                result = response.json()
+                if 'translations' in result:
+                    return [t['text'] for t in result['translations']]
+            else:
+                print(f"DeepL API error: {response.status_code}")
+                
+        except Exception as e:
+            print(f"DeepL API error: {e}")
+        
+        return None
 
 
 # Configuration
 def get_translation_service(google_api_key: Optional[str] = None, 
-                          deepl_api_key: Optional[str] = None) -> TranslationService:
-    """Get configured translation service"""
-    service = TranslationService()
+                          deepl_api_key: Optional[str] = None,
+                          cache_storage=None) -> TranslationService:
+    """Get configured translation service
+    
+    Translations are cached in memory, and also in cache_storage (e.g. the
+    application Database) when given.
+    """
+    service = TranslationService(cache=TranslationCache(cache_storage))
     
     # Add paid APIs if keys are provided
     if google_api_key:
-        google_api = GoogleTranslateAPI(google_api_key)
-        service.providers['google_api'] = lambda text, sl, tl: google_api.translate(text, tl, sl)
-        service.fallback_order.insert(1, 'google_api')  # High priority
+        google_api = GoogleTranslateAPI(google_api_key, service.session)
+        service.add_api_provider(
+            'google_api',
+            lambda text, sl, tl: google_api.translate(text, tl, sl),
+            lambda texts, sl, tl: google_api.translate_batch(texts, tl, sl)
+        )
     
     if deepl_api_key:
-        deepl_api = DeepLAPI(deepl_api_key)
-        service.providers['deepl'] = lambda text, sl, tl: deepl_api.translate(text, tl.upper(), sl.upper())
-        service.fallback_order.insert(1, 'deepl')  # High priority
+        deepl_api = DeepLAPI(deepl_api_key, service.session)
+        service.add_api_provider(
+            'deepl',
+            lambda text, sl, tl: deepl_api.translate(text, tl.upper(), sl.upper()),
+            lambda texts, sl, tl: deepl_api.translate_batch(texts, tl.upper(), sl.upper())
+        )
     
     return service
 